@@ -51,6 +51,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'LittleLemonAPI.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'LittleLemon.urls'
@@ -80,10 +81,44 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Checkout reads then writes in one transaction: take the write lock
+            # up front and wait for it, rather than failing when another
+            # checkout holds it.
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+        # On disk rather than in memory, so that tests running concurrent
+        # requests in threads get SQLite's normal locking.
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
 
+# Cart storage: 'database' writes every cart change to the Cart table,
+# 'cache' keeps carts in Redis at CART_REDIS_URL and writes them behind
+# (see LittleLemonAPI/carts.py), e.g. CART_REDIS_URL = 'redis://localhost:6379/0'.
+CART_STORAGE = 'database'
+CART_REDIS_URL = None
+
+# Idempotency-Key support on write endpoints (see LittleLemonAPI/idempotency.py):
+# how long responses are kept for replay, and how long a duplicate waits
+# for the first request to finish before it is taken for dead.
+IDEMPOTENCY_TTL = 60 * 60 * 24
+IDEMPOTENCY_LOCK_TIMEOUT = 30
+
+# On-demand request profiling for staff users (see LittleLemonAPI/profiling.py):
+# where profiles are written and how many of the most recent ones are kept.
+PROFILING_DIR = BASE_DIR / 'profiles'
+PROFILING_MAX_FILES = 50
+
+# Incremental order sync (see LittleLemonAPI/sync.py): how far back sync
+# cursors reach to cover writes still committing, and how long tombstones
+# of removed orders are kept (older cursors must sync the full list).
+SYNC_CURSOR_OVERLAP = 5
+SYNC_TOMBSTONE_RETENTION_DAYS = 30
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
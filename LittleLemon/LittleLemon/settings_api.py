@@ -0,0 +1,50 @@
+"""
+Django settings for API-only LittleLemon workers.
+
+Builds on the full settings (settings.py) but only loads what the /api/
+endpoints and djoser token auth need: no admin, sessions, messages, CSRF
+or template engine. Select it with:
+
+    DJANGO_SETTINGS_MODULE=LittleLemon.settings_api
+
+and serve LittleLemon.wsgi_api:application, which preloads the app
+registry for fork-based servers (e.g. gunicorn --preload).
+
+Djoser flows that send e-mails (activation, password reset) render
+templates and still need the full settings.
+"""
+
+from .settings import *  # noqa: F401,F403
+from .settings import REST_FRAMEWORK
+
+
+INSTALLED_APPS = [
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'rest_framework',
+    'rest_framework.authtoken',
+    'djoser',
+    'LittleLemonAPI',
+]
+
+# Token auth is handled by DRF itself, so neither sessions nor
+# AuthenticationMiddleware are needed.
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'LittleLemonAPI.profiling.ProfilingMiddleware',
+]
+
+ROOT_URLCONF = 'LittleLemon.urls_api'
+
+TEMPLATES = []
+
+WSGI_APPLICATION = 'LittleLemon.wsgi_api.application'
+
+# JSON only: the browsable API needs the template engine.
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_RENDERER_CLASSES': [
+        'rest_framework.renderers.JSONRenderer',
+    ],
+}
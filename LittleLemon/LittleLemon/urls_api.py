@@ -0,0 +1,22 @@
+"""
+--------------------------------------------------------------------------
+Little Lemon Project - API-only URL Configuration
+--------------------------------------------------------------------------
+
+Used by the API-only worker profile (settings_api.py). Same routes as
+urls.py minus the Django admin, which is not installed in that profile.
+
+Included Routes:
+- /auth/         -> Djoser authentication endpoints (token-based login, logout, registration, etc.)
+- /api/          -> Application API endpoints (menu items, cart, orders, user management, etc.)
+
+--------------------------------------------------------------------------
+"""
+
+from django.urls import path, include
+
+urlpatterns = [
+    path('auth/', include('djoser.urls')),
+    path('auth/', include('djoser.urls.authtoken')),
+    path('api/', include('LittleLemonAPI.urls')),
+]
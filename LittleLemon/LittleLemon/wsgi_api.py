@@ -0,0 +1,35 @@
+"""
+WSGI config for API-only LittleLemon workers.
+
+Uses the API-only settings (settings_api.py) and preloads everything a
+worker would otherwise import on its first request: the URLconf (and so
+every view and serializer) and DRF's default classes. Served with a
+fork-based server and preloading, e.g.
+
+    gunicorn --preload LittleLemon.wsgi_api
+
+the workers share that state with the master instead of each building
+their own copy.
+"""
+
+import gc
+import os
+
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'LittleLemon.settings_api')
+
+application = get_wsgi_application()
+
+from django.urls import get_resolver  # noqa: E402
+from rest_framework.settings import api_settings  # noqa: E402
+
+get_resolver().url_patterns
+api_settings.DEFAULT_AUTHENTICATION_CLASSES
+api_settings.DEFAULT_PERMISSION_CLASSES
+api_settings.DEFAULT_RENDERER_CLASSES
+api_settings.DEFAULT_PARSER_CLASSES
+
+# Move the preloaded objects out of the garbage collector's reach so that
+# collections in the workers don't write to (and un-share) their pages.
+gc.freeze()
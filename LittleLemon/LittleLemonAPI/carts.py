@@ -0,0 +1,288 @@
+"""
+---------------------------------------------------------------------
+Cart Storage for the Little Lemon API
+---------------------------------------------------------------------
+
+Carts churn heavily: customers add, change and drop items many times
+before checking out. This module hides where a cart actually lives so
+that the views can stay the same whichever storage mode is selected
+with the CART_STORAGE setting:
+
+- 'database': every cart change is written straight to the Cart table
+  (the original behaviour).
+- 'cache': each user's cart is kept in Redis (CART_REDIS_URL) and
+  written behind to Cart rows lazily (on the next read of a changed
+  cart, on checkout, or by the flush_carts management command). Cached
+  carts saved under an older menu version are repriced when next read
+  (see pricing.py).
+
+Every cart change is a single atomic Redis command or MULTI block on the
+user's hash and on the set of changed carts, so concurrent requests of
+the same user never lose a line. Redis keeps carts with no expiry and
+must be configured not to evict them (maxmemory-policy noeviction) so
+that a cart that has not been written behind yet is never lost.
+
+---------------------------------------------------------------------
+"""
+
+from decimal import Decimal
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import checks
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+
+from .models import Cart, MenuItem
+
+
+CART_KEY = 'cart:{user_id}'
+DIRTY_KEY = 'cart:dirty'
+MENU_VERSION_KEY = 'menu:version'
+
+
+class DatabaseCartStore:
+    """
+    Stores carts directly in the Cart table.
+    """
+    def add(self, user, menuitem, quantity):
+        Cart.objects.update_or_create(
+            user=user,
+            menuitem=menuitem,
+            defaults={
+                'quantity': quantity,
+                'unit_price': menuitem.price,
+                'price': quantity * menuitem.price,
+            }
+        )
+
+    def lines(self, user):
+        return Cart.objects.filter(user=user)
+
+    def materialize(self, user):
+        """Cart rows are always up to date, nothing to write behind."""
+
+    def clear(self, user):
+        """Cart rows are removed by the checkout itself."""
+
+    def menu_changed(self):
+        """Cart rows are repriced in place, nothing to invalidate."""
+
+
+class CachedCartStore:
+    """
+    Keeps carts in Redis and writes them behind to the Cart table.
+
+    A cached cart is a hash with the fields:
+        qty:<menuitem_id>, price:<menuitem_id>  one pair per line
+        id:<menuitem_id>   Cart row of lines already written behind, so that
+                           reading the cart renders exactly like Cart rows
+        version            menu version the prices were taken at (its
+                           presence also means the cart was loaded)
+        rev, synced        bumped on every change / rev last written behind
+    Users whose cart changed are kept in the DIRTY_KEY set for flush().
+    """
+    def __init__(self):
+        self.redis = _redis(settings.CART_REDIS_URL)
+
+    def _key(self, user):
+        return CART_KEY.format(user_id=user.pk)
+
+    def menu_version(self):
+        """Return the current menu version (0 until the menu first changes)."""
+        return int(self.redis.get(MENU_VERSION_KEY) or 0)
+
+    def menu_changed(self):
+        """Mark the prices of every cached cart as stale."""
+        self.redis.incr(MENU_VERSION_KEY)
+
+    def _load(self, user):
+        key = self._key(user)
+        fields = self.redis.hgetall(key)
+        if 'version' not in fields:
+            # Cold cache: start from whatever was written behind earlier,
+            # without overwriting lines added concurrently.
+            pipe = self.redis.pipeline()
+            for row in Cart.objects.filter(user=user):
+                pipe.hsetnx(key, f'qty:{row.menuitem_id}', row.quantity)
+                pipe.hsetnx(key, f'price:{row.menuitem_id}', str(row.unit_price))
+                pipe.hsetnx(key, f'id:{row.menuitem_id}', row.id)
+            pipe.hsetnx(key, 'version', self.menu_version())
+            pipe.hsetnx(key, 'rev', 0)
+            pipe.hsetnx(key, 'synced', 0)
+            pipe.hgetall(key)
+            fields = pipe.execute()[-1]
+
+        entry = {'lines': {}, 'ids': {}}
+        for field, value in fields.items():
+            name, _, menuitem_id = field.partition(':')
+            if name == 'qty' and f'price:{menuitem_id}' in fields:
+                entry['lines'][int(menuitem_id)] = [int(value), fields[f'price:{menuitem_id}']]
+            elif name == 'id':
+                entry['ids'][int(menuitem_id)] = int(value)
+        entry['rev'] = int(fields.get('rev', 0))
+        entry['dirty'] = entry['rev'] != int(fields.get('synced', 0))
+
+        if int(fields['version']) != self.menu_version():
+            self._reprice(user, entry)
+        return entry
+
+    def _reprice(self, user, entry):
+        """Reprice a cart saved before the latest menu price change."""
+        version = self.menu_version()
+        prices = dict(MenuItem.objects.filter(id__in=list(entry['lines'])).values_list('id', 'price'))
+        changed = {}
+        for menuitem_id, line in entry['lines'].items():
+            if menuitem_id in prices and Decimal(line[1]) != prices[menuitem_id]:
+                line[1] = changed[f'price:{menuitem_id}'] = str(prices[menuitem_id])
+        if changed:
+            entry['rev'] = self._change(user, changed)
+            entry['dirty'] = True
+        self.redis.hset(self._key(user), 'version', version)
+
+    def _change(self, user, mapping):
+        """Apply a change to the cart and mark it dirty, atomically. Returns the new rev."""
+        key = self._key(user)
+        pipe = self.redis.pipeline()
+        pipe.hset(key, mapping=mapping)
+        pipe.hincrby(key, 'rev', 1)
+        pipe.sadd(DIRTY_KEY, user.pk)
+        return pipe.execute()[1]
+
+    def add(self, user, menuitem, quantity):
+        # Load first so that a cold cart keeps the lines written behind earlier.
+        self._load(user)
+        self._change(user, {f'qty:{menuitem.id}': quantity, f'price:{menuitem.id}': str(menuitem.price)})
+
+    def lines(self, user):
+        entry = self._load(user)
+        if entry['dirty']:
+            # Give every line a Cart id so the serializer output stays the same.
+            entry = self.materialize(user)
+        menuitems = MenuItem.objects.in_bulk(list(entry['lines']))
+        lines = []
+        for menuitem_id, (quantity, unit_price) in entry['lines'].items():
+            if menuitem_id not in menuitems:
+                continue
+            unit_price = Decimal(unit_price)
+            lines.append(Cart(
+                id=entry['ids'].get(menuitem_id),
+                user=user,
+                menuitem=menuitems[menuitem_id],
+                quantity=quantity,
+                unit_price=unit_price,
+                price=quantity * unit_price,
+            ))
+        return lines
+
+    @transaction.atomic
+    def materialize(self, user):
+        """
+        Write the cached cart behind to Cart rows and return the cart entry.
+        """
+        entry = self._load(user)
+        if not entry['dirty']:
+            return entry
+
+        key = self._key(user)
+        menuitem_ids = list(entry['lines'])
+        Cart.objects.filter(user=user).exclude(menuitem_id__in=menuitem_ids).delete()
+        # Lines for menu items deleted in the meantime are dropped here.
+        existing = set(MenuItem.objects.filter(id__in=menuitem_ids).values_list('id', flat=True))
+        gone = [menuitem_id for menuitem_id in menuitem_ids if menuitem_id not in existing]
+        if gone:
+            self.redis.hdel(key, *(f'{name}:{menuitem_id}' for menuitem_id in gone for name in ('qty', 'price', 'id')))
+        rows = []
+        for menuitem_id, (quantity, unit_price) in entry['lines'].items():
+            if menuitem_id not in existing:
+                continue
+            unit_price = Decimal(unit_price)
+            rows.append(Cart(
+                user=user,
+                menuitem_id=menuitem_id,
+                quantity=quantity,
+                unit_price=unit_price,
+                price=quantity * unit_price,
+            ))
+        Cart.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['user', 'menuitem'],
+            update_fields=['quantity', 'unit_price', 'price'],
+        )
+
+        entry['lines'] = {
+            menuitem_id: line for menuitem_id, line in entry['lines'].items()
+            if menuitem_id in existing
+        }
+        entry['ids'] = dict(Cart.objects.filter(user=user).values_list('menuitem_id', 'id'))
+        entry['dirty'] = False
+
+        def mark_clean():
+            # Only mark the cart clean once the rows are really there: a
+            # checkout that rolls back must leave it dirty so it is written
+            # behind again. Changes made meanwhile have a higher rev and keep
+            # it dirty.
+            mapping = {f'id:{menuitem_id}': cart_id for menuitem_id, cart_id in entry['ids'].items()}
+            self.redis.hset(key, mapping={**mapping, 'synced': entry['rev']})
+        transaction.on_commit(mark_clean)
+        return entry
+
+    def clear(self, user):
+        # After materialize()'s own on-commit callback, which would otherwise
+        # write the checked-out cart back; and not at all if the checkout rolls back.
+        key = self._key(user)
+        transaction.on_commit(lambda: self.redis.delete(key))
+
+    def flush(self):
+        """
+        Write behind every cart changed since the last flush.
+        Returns the number of carts written.
+        """
+        flushed = 0
+        for user_id in self.redis.sscan_iter(DIRTY_KEY):
+            # Unmark before reading the cart: carts changed while flushing
+            # are marked again, and are put back if writing them fails.
+            self.redis.srem(DIRTY_KEY, user_id)
+            user = User.objects.filter(pk=user_id).first()
+            if user is None:
+                continue
+            try:
+                self.materialize(user)
+            except Exception:
+                self.redis.sadd(DIRTY_KEY, user_id)
+                raise
+            flushed += 1
+        return flushed
+
+
+@lru_cache
+def _redis(url):
+    """One Redis client (and connection pool) per URL, shared by the process."""
+    if not url:
+        raise ImproperlyConfigured("CART_STORAGE = 'cache' requires CART_REDIS_URL to be set.")
+    try:
+        import redis
+    except ImportError as exc:
+        raise ImproperlyConfigured("CART_STORAGE = 'cache' requires the redis package (pip install redis).") from exc
+    return redis.Redis.from_url(url, decode_responses=True)
+
+
+def get_cart_store():
+    """Return the cart store selected by the CART_STORAGE setting."""
+    storage = getattr(settings, 'CART_STORAGE', 'database')
+    if storage == 'cache':
+        return CachedCartStore()
+    if storage != 'database':
+        raise ImproperlyConfigured(f"CART_STORAGE must be 'database' or 'cache', not {storage!r}.")
+    return DatabaseCartStore()
+
+
+def check_cart_storage(app_configs, **kwargs):
+    """System check: fail at start-up rather than on the first cart request."""
+    try:
+        get_cart_store()
+    except ImproperlyConfigured as exc:
+        return [checks.Error(str(exc), id='LittleLemonAPI.E001')]
+    return []
@@ -0,0 +1,162 @@
+"""
+---------------------------------------------------------------------
+Bulk Menu Import/Export for the Little Lemon API
+---------------------------------------------------------------------
+
+Loads and dumps the whole catalog (menu items and their categories) in
+one go instead of one item per request. Both directions stream: rows
+are read, upserted and written in fixed-size chunks, so memory use does
+not grow with the size of the file.
+
+Supported formats: 'csv' and 'jsonl' (JSON Lines), with the fields:
+
+    title, price, category, category_title, featured
+
+- category is the Category slug; missing categories are created in bulk,
+  titled after category_title (or the slug when it is empty).
+- Menu items are upserted by title.
+
+A whole import runs in one transaction: any invalid row rolls it back.
+Open carts are repriced once at the end (which also bumps the menu
+version once), see pricing.py.
+
+---------------------------------------------------------------------
+"""
+
+import csv
+import json
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import transaction
+
+from .models import Category, MenuItem
+from .pricing import reprice_carts
+
+
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/jsonl',
+}
+FIELDS = ['title', 'price', 'category', 'category_title', 'featured']
+CHUNK_SIZE = 1000
+MAX_PRICE = Decimal('9999.99')
+
+
+class CatalogImportError(ValueError):
+    """Raised for an invalid row; the message names the offending line."""
+
+
+def read_rows(lines, fmt):
+    """Parse an iterable of text lines into row dicts, lazily."""
+    if fmt == 'csv':
+        return csv.DictReader(lines)
+    if fmt == 'jsonl':
+        return (json.loads(line) for line in lines if line.strip())
+    raise CatalogImportError(f'Unknown format {fmt!r}, expected one of: {", ".join(FORMATS)}')
+
+
+def _parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value or '').strip().lower() in ('1', 'true', 'yes', 'y')
+
+
+def _parse_row(number, row):
+    try:
+        title = str(row.get('title') or '').strip()
+        slug = str(row.get('category') or '').strip()
+        price = Decimal(str(row.get('price'))).quantize(Decimal('0.01'))
+        if not price.is_finite():
+            # NaN quantizes fine but can't be compared with the price range.
+            raise InvalidOperation('price is not a number')
+    except (AttributeError, InvalidOperation) as exc:
+        raise CatalogImportError(f'Row {number}: missing or invalid field ({exc!r})')
+    if not title or not slug:
+        raise CatalogImportError(f'Row {number}: title and category are required')
+    if not Decimal('0') <= price <= MAX_PRICE:
+        raise CatalogImportError(f'Row {number}: price out of range')
+    return {
+        'title': title,
+        'price': price,
+        'category': slug,
+        'category_title': str(row.get('category_title') or '').strip() or slug.replace('-', ' ').title(),
+        'featured': _parse_bool(row.get('featured')),
+    }
+
+
+def _resolve_categories(rows, categories):
+    """Fill the slug -> id map for every category used by the rows, creating missing ones."""
+    wanted = {row['category']: row['category_title'] for row in rows if row['category'] not in categories}
+    if not wanted:
+        return 0
+    categories.update(Category.objects.filter(slug__in=wanted).values_list('slug', 'id'))
+    missing = [slug for slug in wanted if slug not in categories]
+    if missing:
+        Category.objects.bulk_create(
+            [Category(title=wanted[slug], slug=slug) for slug in missing],
+            ignore_conflicts=True,
+        )
+        categories.update(Category.objects.filter(slug__in=missing).values_list('slug', 'id'))
+    return len(missing)
+
+
+@transaction.atomic
+def import_menu(rows, chunk_size=CHUNK_SIZE):
+    """
+    Upsert menu items from an iterable of row dicts.
+    Returns {'items': <rows upserted>, 'categories_created': <count>}.
+    """
+    categories = {}  # slug -> id, bounded by the number of categories
+    items = categories_created = 0
+    numbered = enumerate(rows, start=1)
+    while True:
+        chunk = [_parse_row(number, row) for number, row in islice(numbered, chunk_size)]
+        if not chunk:
+            break
+        categories_created += _resolve_categories(chunk, categories)
+        # A title repeated within a chunk keeps its last row: one row can't be upserted twice.
+        by_title = {
+            row['title']: MenuItem(
+                title=row['title'],
+                price=row['price'],
+                category_id=categories[row['category']],
+                featured=row['featured'],
+            )
+            for row in chunk
+        }
+        MenuItem.objects.bulk_create(
+            list(by_title.values()),
+            update_conflicts=True,
+            unique_fields=['title'],
+            update_fields=['price', 'category', 'featured'],
+        )
+        items += len(chunk)
+
+    reprice_carts()
+    return {'items': items, 'categories_created': categories_created}
+
+
+class _Echo:
+    """File-like object whose write() hands the line back, for streaming csv.writer."""
+    def write(self, value):
+        return value
+
+
+def export_menu(fmt, chunk_size=CHUNK_SIZE):
+    """Yield the whole catalog as text lines in the given format."""
+    if fmt not in FORMATS:
+        raise CatalogImportError(f'Unknown format {fmt!r}, expected one of: {", ".join(FORMATS)}')
+    rows = (
+        MenuItem.objects.order_by('id')
+        .values_list('title', 'price', 'category__slug', 'category__title', 'featured')
+        .iterator(chunk_size=chunk_size)
+    )
+    if fmt == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(FIELDS)
+        for row in rows:
+            yield writer.writerow(row)
+    else:
+        for row in rows:
+            yield json.dumps(dict(zip(FIELDS, row)), default=str) + '\n'
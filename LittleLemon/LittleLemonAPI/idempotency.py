@@ -0,0 +1,135 @@
+"""
+---------------------------------------------------------------------
+Idempotency Keys for the Little Lemon API
+---------------------------------------------------------------------
+
+Clients on flaky networks retry writes. A write sent with an
+'Idempotency-Key' header is executed at most once per (user, key): the
+first response is stored in an IdempotencyKey row for IDEMPOTENCY_TTL
+seconds and every retry gets that response back (with an
+'Idempotent-Replayed: true' header) without running the view again.
+
+Concurrent duplicates are collapsed: the first request inserts the
+(user, key) row, unique in the database, and executes; the others fail
+to insert it and wait for its response, then replay it. A request that
+still has not finished after IDEMPOTENCY_LOCK_TIMEOUT seconds is taken
+for dead (e.g. its worker was killed) and its key can be used again.
+
+Server errors (5xx) and exceptions are not stored, so the request can
+be retried with the same key. Reusing a key for a different request
+body is rejected with 422. Expired keys are deleted by the
+prune_idempotency_keys command.
+
+Usage:
+    class CartView(generics.ListCreateAPIView):
+        @idempotent
+        def post(self, request, *args, **kwargs):
+            ...
+---------------------------------------------------------------------
+"""
+
+import hashlib
+import json
+import time
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+POLL_INTERVAL = 0.05
+
+
+def _fingerprint(request):
+    """Hash of what makes a request 'the same request'."""
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(f'{request.method} {request.path} {body}'.encode()).hexdigest()[:32]
+
+
+def _replay(record, fingerprint):
+    if record.fingerprint != fingerprint:
+        return Response(
+            {'message': 'Idempotency-Key was already used for a different request'},
+            status=422,
+        )
+    return Response(record.response, status=record.status, headers={'Idempotent-Replayed': 'true'})
+
+
+def expiry_horizon():
+    return timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_TTL)
+
+
+def _claim(user, digest, fingerprint):
+    """
+    Insert the (user, key) row and return it, or return the existing row if
+    another request holds the key. Expired and abandoned rows are replaced.
+    """
+    while True:
+        try:
+            # Committed right away (in its own transaction) so duplicates see it.
+            with transaction.atomic():
+                return True, IdempotencyKey.objects.create(user=user, key=digest, fingerprint=fingerprint)
+        except IntegrityError:
+            pass
+        record = IdempotencyKey.objects.filter(user=user, key=digest).first()
+        if record is None:
+            continue  # Released in the meantime
+        abandoned = timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT)
+        if record.created < expiry_horizon() or (record.status is None and record.created < abandoned):
+            IdempotencyKey.objects.filter(pk=record.pk, created=record.created).delete()
+            continue
+        return False, record
+
+
+def idempotent(handler):
+    """
+    Make a view handler (post, create...) honour the Idempotency-Key header.
+    Requests without the header are handled as usual.
+    """
+    @wraps(handler)
+    def wrapper(view, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if key is None:
+            return handler(view, request, *args, **kwargs)
+        if not key or len(key) > 255:
+            return Response({'message': 'Invalid Idempotency-Key'}, status=400)
+
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        fingerprint = _fingerprint(request)
+        deadline = time.monotonic() + settings.IDEMPOTENCY_LOCK_TIMEOUT
+
+        while True:
+            claimed, record = _claim(request.user, digest, fingerprint)
+            if claimed:
+                break
+            if record.status is not None:
+                return _replay(record, fingerprint)
+
+            # A duplicate is executing: wait for its response.
+            if time.monotonic() >= deadline:
+                return Response(
+                    {'message': 'A request with this Idempotency-Key is still in progress'},
+                    status=409,
+                )
+            time.sleep(POLL_INTERVAL)
+
+        # Filtered by pk: the row is gone if this request outlived the lock timeout.
+        claim = IdempotencyKey.objects.filter(pk=record.pk)
+        try:
+            response = handler(view, request, *args, **kwargs)
+        except BaseException:
+            claim.delete()
+            raise
+        if response.status_code >= 500:
+            claim.delete()
+        else:
+            claim.update(status=response.status_code, response=response.data)
+        return response
+
+    return wrapper
@@ -0,0 +1,167 @@
+"""
+---------------------------------------------------------------------
+Inventory Reservation for the Little Lemon API
+---------------------------------------------------------------------
+
+Checkout reserves stock for every cart line inside the checkout
+transaction, with atomic conditional decrements:
+
+    UPDATE ... SET stock = stock - n WHERE ... AND stock >= n
+
+so two concurrent checkouts can never both take the last portions:
+the second UPDATE simply matches no row. If any line cannot be
+reserved, OutOfStock is raised and the whole checkout rolls back.
+
+Where the stock lives depends on the menu item:
+
+- stock is None and stock_shards == 0: not tracked, never runs out;
+  checkout does not write to it at all.
+- stock_shards == 0: in MenuItem.stock.
+- stock_shards > 0: spread over that many StockShard rows. A checkout
+  tries the shards in random order, so concurrent checkouts of a hot
+  item update different rows. Only when no single shard holds enough
+  are all shards locked and the quantity taken across them.
+
+Deleting an order that has not been delivered yet puts its stock back.
+Use set_stock() (or the set_stock command) to change stock or sharding.
+
+---------------------------------------------------------------------
+"""
+
+import random
+
+from django.db import transaction
+from django.db.models import F, Q, Sum
+
+from .models import MenuItem, OrderItem, StockShard
+
+
+class OutOfStock(Exception):
+    """Raised when cart lines cannot be reserved; titles lists the menu items short of stock."""
+    def __init__(self, titles):
+        super().__init__(f"Out of stock: {', '.join(titles)}")
+        self.titles = titles
+
+
+def _merge(lines):
+    """Sum quantities per menu item, ordered by id so that concurrent reservations lock rows in the same order."""
+    quantities = {}
+    for menuitem_id, quantity in lines:
+        quantities[menuitem_id] = quantities.get(menuitem_id, 0) + quantity
+    return sorted(quantities.items())
+
+
+def _tracking(menuitem_ids):
+    """Map each tracked menu item to its shard count (0 for stock kept on the item itself)."""
+    return {
+        menuitem_id: shards
+        for menuitem_id, stock, shards in MenuItem.objects.filter(id__in=menuitem_ids)
+        .values_list('id', 'stock', 'stock_shards')
+        if stock is not None or shards
+    }
+
+
+def _take_from_shards(menuitem_id, shard_count, quantity):
+    start = random.randrange(shard_count)
+    for offset in range(shard_count):
+        shard = (start + offset) % shard_count
+        if StockShard.objects.filter(menuitem_id=menuitem_id, shard=shard, stock__gte=quantity).update(
+            stock=F('stock') - quantity
+        ):
+            return True
+
+    # No single shard holds enough: lock them all and take across them.
+    shards = list(StockShard.objects.select_for_update().filter(menuitem_id=menuitem_id).order_by('shard'))
+    if sum(shard.stock for shard in shards) < quantity:
+        return False
+    remaining = quantity
+    for shard in shards:
+        taken = min(shard.stock, remaining)
+        if taken:
+            StockShard.objects.filter(pk=shard.pk).update(stock=F('stock') - taken)
+            remaining -= taken
+        if not remaining:
+            break
+    return True
+
+
+def reserve(lines):
+    """
+    Take stock for an iterable of (menuitem_id, quantity). Must run inside the
+    checkout transaction; raises OutOfStock (after trying every line) if any
+    line cannot be reserved, and the caller must then roll back.
+    """
+    lines = _merge(lines)
+    tracked = _tracking([menuitem_id for menuitem_id, _ in lines])
+    short = []
+    for menuitem_id, quantity in lines:
+        if menuitem_id not in tracked:
+            # Untracked items never run out: no write, so no lock on their row.
+            continue
+        if tracked[menuitem_id]:
+            reserved = _take_from_shards(menuitem_id, tracked[menuitem_id], quantity)
+        else:
+            # Stock cleared by set_stock() in the meantime: the item is untracked and matches too.
+            reserved = MenuItem.objects.filter(
+                Q(stock__isnull=True) | Q(stock__gte=quantity), pk=menuitem_id,
+            ).update(stock=F('stock') - quantity)
+        if not reserved:
+            short.append(menuitem_id)
+    if short:
+        titles = MenuItem.objects.filter(id__in=short).order_by('id').values_list('title', flat=True)
+        raise OutOfStock(list(titles))
+
+
+def release(lines):
+    """Put back stock for an iterable of (menuitem_id, quantity)."""
+    lines = _merge(lines)
+    tracked = _tracking([menuitem_id for menuitem_id, _ in lines])
+    for menuitem_id, quantity in lines:
+        if menuitem_id not in tracked:
+            continue
+        if tracked[menuitem_id]:
+            StockShard.objects.filter(
+                menuitem_id=menuitem_id, shard=random.randrange(tracked[menuitem_id]),
+            ).update(stock=F('stock') + quantity)
+        else:
+            MenuItem.objects.filter(pk=menuitem_id, stock__isnull=False).update(stock=F('stock') + quantity)
+
+
+def release_orders(orders):
+    """Put back the stock of a queryset of orders about to be deleted, except delivered ones."""
+    release(
+        OrderItem.objects.filter(order__in=orders.filter(status=False))
+        .order_by().values('menuitem').annotate(quantity=Sum('quantity'))
+        .values_list('menuitem', 'quantity')
+    )
+
+
+def available(menuitem):
+    """Stock left for a menu item, or None if it is not tracked."""
+    if menuitem.stock_shards:
+        return StockShard.objects.filter(menuitem=menuitem).aggregate(total=Sum('stock'))['total'] or 0
+    return menuitem.stock
+
+
+@transaction.atomic
+def set_stock(menuitem, quantity, shards=None):
+    """
+    Set the stock of a menu item (None to stop tracking it), spreading it
+    evenly over `shards` StockShard rows (0 for none; None keeps the current
+    sharding).
+    """
+    if shards is None:
+        shards = menuitem.stock_shards
+    if quantity is None:
+        shards = 0
+    StockShard.objects.filter(menuitem=menuitem).delete()
+    if shards:
+        StockShard.objects.bulk_create(
+            StockShard(menuitem=menuitem, shard=shard, stock=quantity // shards + (shard < quantity % shards))
+            for shard in range(shards)
+        )
+        menuitem.stock = None
+    else:
+        menuitem.stock = quantity
+    menuitem.stock_shards = shards
+    menuitem.save(update_fields=['stock', 'stock_shards'])
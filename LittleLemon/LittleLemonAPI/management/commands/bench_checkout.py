@@ -0,0 +1,115 @@
+"""
+---------------------------------------------------------------------
+Django Custom Management Command: bench_checkout
+---------------------------------------------------------------------
+
+Races many clients for the same menu item to check that checkout never
+oversells and to measure its throughput under contention. The command:
+
+- creates a throw-away test database (like the test runner does),
+- gives one menu item a limited stock, optionally sharded,
+- fills one cart per client with that item,
+- starts every client's checkout (POST /api/orders/) at the same time,
+  one thread and database connection per client,
+- reports orders placed, rejections, errors, throughput and latency,
+  and checks that the stock left matches what was sold.
+
+Usage:
+    python manage.py bench_checkout
+    python manage.py bench_checkout --clients 100 --stock 50 --shards 8
+---------------------------------------------------------------------
+"""
+
+
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Sum
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+from LittleLemonAPI.inventory import available, set_stock
+from LittleLemonAPI.models import Cart, Category, MenuItem, OrderItem
+from LittleLemonAPI.views import OrderView
+
+
+class Command(BaseCommand):
+    help = 'Benchmark concurrent checkouts racing for the same menu item'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=100, help='Concurrent checkouts.')
+        parser.add_argument('--stock', type=int, default=50, help='Stock of the contended menu item.')
+        parser.add_argument('--quantity', type=int, default=1, help='Portions in each cart.')
+        parser.add_argument('--shards', type=int, default=0, help='Stock shards for the menu item (0 for none).')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite' and not connection.settings_dict['TEST']['NAME']:
+            # Threads need a database file, not the test runner's in-memory database.
+            connection.settings_dict['TEST']['NAME'] = str(settings.BASE_DIR / 'bench_checkout.sqlite3')
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(CART_STORAGE='database'):
+                self.run(options['clients'], options['stock'], options['quantity'], options['shards'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def run(self, clients, stock, quantity, shards):
+        category = Category.objects.create(title='Bench', slug='bench-checkout')
+        menuitem = MenuItem.objects.create(title='bench-hot-item', price='5.00', category=category)
+        set_stock(menuitem, stock, shards)
+        User.objects.bulk_create(User(username=f'bench-checkout-{i}', password='!') for i in range(clients))
+        users = list(User.objects.filter(username__startswith='bench-checkout-'))
+        Cart.objects.bulk_create(
+            Cart(user=user, menuitem=menuitem, quantity=quantity, unit_price='5.00', price=5 * quantity)
+            for user in users
+        )
+        connection.close()
+
+        factory = APIRequestFactory()
+        view = OrderView.as_view()
+        barrier = threading.Barrier(clients)
+
+        def checkout(user):
+            request = factory.post('/api/orders/')
+            force_authenticate(request, user=user)
+            barrier.wait()
+            start = time.perf_counter()
+            try:
+                status = view(request).status_code
+            except Exception as exc:
+                status = type(exc).__name__
+            finally:
+                connection.close()
+            return status, time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as executor:
+            results = list(executor.map(checkout, users))
+        elapsed = time.perf_counter() - start
+
+        statuses = [status for status, _ in results]
+        latencies = sorted(latency for _, latency in results)
+        placed = statuses.count(201)
+        rejected = statuses.count(409)
+        errors = len(statuses) - placed - rejected
+        left = available(MenuItem.objects.get(pk=menuitem.pk))
+        sold = OrderItem.objects.filter(menuitem=menuitem).aggregate(total=Sum('quantity'))['total'] or 0
+
+        self.stdout.write(f'{clients} clients, stock {stock}, {quantity} per cart, {shards} shard(s)')
+        self.stdout.write(f'Placed {placed}, out of stock {rejected}, errors {errors}')
+        if errors:
+            self.stdout.write(f'Errors: {sorted(set(map(str, statuses)) - {"201", "409"})}')
+        self.stdout.write(
+            f'{elapsed:.2f}s total, {clients / elapsed:.0f} checkouts/s, '
+            f'latency p50 {statistics.median(latencies) * 1000:.0f} ms, '
+            f'p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.0f} ms'
+        )
+        self.stdout.write(f'Stock left {left}, sold {sold}')
+        if sold > stock or left != stock - sold or sold != placed * quantity:
+            raise CommandError('Inventory is inconsistent: stock was oversold or lost.')
+        self.stdout.write(self.style.SUCCESS('No overselling.'))
@@ -0,0 +1,94 @@
+"""
+---------------------------------------------------------------------
+Django Custom Management Command: bench_reprice
+---------------------------------------------------------------------
+
+Benchmarks cart repricing against a large number of open cart lines
+(1,000,000 by default). The command:
+
+- creates throw-away users, a category and menu items,
+- fills the Cart table with the requested number of lines,
+- changes every menu price with a bulk UPDATE,
+- times repricing a single menu item and then the whole catalog.
+
+Everything runs on a throw-away test database (like the test runner
+does), so neither the data nor the locks touch the real carts.
+
+Usage:
+    python manage.py bench_reprice
+    python manage.py bench_reprice --lines 100000 --menuitems 50
+---------------------------------------------------------------------
+"""
+
+
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import F
+from django.test.utils import override_settings
+from LittleLemonAPI.models import Cart, Category, MenuItem
+from LittleLemonAPI.pricing import reprice_carts
+
+
+class Command(BaseCommand):
+    help = 'Benchmark set-based cart repricing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lines', type=int, default=1_000_000, help='Open cart lines to create.')
+        parser.add_argument('--menuitems', type=int, default=100, help='Menu items in the catalog.')
+        parser.add_argument('--batch-size', type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(CART_STORAGE='database'):
+                self.run(options['lines'], options['menuitems'], options['batch_size'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def timed(self, label, func):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f'{label}: {result} row(s) in {elapsed:.2f}s')
+        return result
+
+    def run(self, lines, menuitem_count, batch_size):
+        users_needed = -(-lines // menuitem_count)
+        category = Category.objects.create(title='Bench', slug='bench-reprice')
+        menuitems = MenuItem.objects.bulk_create(
+            MenuItem(title=f'bench-{i}', price='5.00', category=category)
+            for i in range(menuitem_count)
+        )
+        users = User.objects.bulk_create(
+            (User(username=f'bench-reprice-{i}', password='!') for i in range(users_needed)),
+            batch_size=batch_size,
+        )
+        if not users[0].pk:
+            users = list(User.objects.filter(username__startswith='bench-reprice-'))
+
+        def cart_lines():
+            created = 0
+            for user in users:
+                for menuitem in menuitems:
+                    if created == lines:
+                        return
+                    created += 1
+                    yield Cart(user=user, menuitem=menuitem, quantity=2, unit_price='5.00', price='10.00')
+
+        start = time.perf_counter()
+        batch = []
+        for line in cart_lines():
+            batch.append(line)
+            if len(batch) == batch_size:
+                Cart.objects.bulk_create(batch)
+                batch = []
+        Cart.objects.bulk_create(batch)
+        self.stdout.write(f'Created {lines} cart line(s) in {time.perf_counter() - start:.2f}s')
+
+        MenuItem.objects.filter(category=category).update(price=F('price') + 1)
+        self.timed('Reprice one menu item', lambda: reprice_carts([menuitems[0].pk]))
+        self.timed('Reprice whole catalog', reprice_carts)
+        self.timed('Reprice whole catalog again (no changes)', reprice_carts)
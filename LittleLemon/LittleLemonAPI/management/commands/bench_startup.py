@@ -0,0 +1,84 @@
+"""
+---------------------------------------------------------------------
+Django Custom Management Command: bench_startup
+---------------------------------------------------------------------
+
+Measures what a freshly started worker costs under each settings
+profile: the time to import and set up Django and load the URLconf
+(everything needed before serving the first request), and the resident
+memory (RSS) of the worker once that is done.
+
+Each sample is a new Python process, so the numbers include interpreter
+start-up and are comparable between profiles.
+
+Usage:
+    python manage.py bench_startup
+    python manage.py bench_startup --runs 10 --profile LittleLemon.settings_api
+
+--exclude pretends a module is not installed, e.g. to estimate the gain
+of a lean install (requirements-api.txt) from a full environment:
+    python manage.py bench_startup --exclude requests --exclude pygments
+---------------------------------------------------------------------
+"""
+
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+# Runs in the child process; prints {"seconds": ..., "rss_kib": ...}.
+WORKER = """
+import json, os, resource, sys, time
+for name in filter(None, os.environ.get('BENCH_EXCLUDE', '').split(',')):
+    sys.modules[name] = None
+start = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+from django.urls import get_resolver
+get_resolver().url_patterns
+seconds = time.perf_counter() - start
+rss_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+try:
+    with open('/proc/self/status') as status:
+        rss_kib = next(int(line.split()[1]) for line in status if line.startswith('VmRSS:'))
+except OSError:
+    pass
+print(json.dumps({'seconds': seconds, 'rss_kib': rss_kib}))
+"""
+
+
+class Command(BaseCommand):
+    help = 'Benchmark worker start-up time and memory per settings profile'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help='Worker processes to start per profile.')
+        parser.add_argument(
+            '--profile', action='append', dest='profiles',
+            help='Settings module to benchmark (repeatable). Defaults to the full and API-only profiles.',
+        )
+        parser.add_argument(
+            '--exclude', action='append', default=[],
+            help='Module to treat as not installed in the workers (repeatable).',
+        )
+
+    def handle(self, *args, **options):
+        profiles = options['profiles'] or ['LittleLemon.settings', 'LittleLemon.settings_api']
+        for profile in profiles:
+            samples = [self.sample(profile, options['exclude']) for _ in range(options['runs'])]
+            seconds = statistics.median(sample['seconds'] for sample in samples)
+            rss = statistics.median(sample['rss_kib'] for sample in samples) / 1024
+            self.stdout.write(f'{profile}: start-up {seconds * 1000:.0f} ms, RSS {rss:.1f} MiB (median of {len(samples)})')
+
+    def sample(self, profile, exclude):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': profile, 'BENCH_EXCLUDE': ','.join(exclude)}
+        result = subprocess.run(
+            [sys.executable, '-c', WORKER],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+        )
+        return json.loads(result.stdout.strip().splitlines()[-1])
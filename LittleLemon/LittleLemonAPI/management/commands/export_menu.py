@@ -0,0 +1,40 @@
+"""
+---------------------------------------------------------------------
+Django Custom Management Command: export_menu
+---------------------------------------------------------------------
+
+Streams the whole catalog to a CSV or JSON Lines file (or standard
+output) in the format read back by import_menu.
+
+Usage:
+    python manage.py export_menu menu.csv
+    python manage.py export_menu --format jsonl > menu.jsonl
+---------------------------------------------------------------------
+"""
+
+
+import sys
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from LittleLemonAPI.catalog import FORMATS, export_menu
+
+class Command(BaseCommand):
+    help = 'Export the menu as CSV or JSON Lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-', help="Output file, or '-' (default) for standard output.")
+        parser.add_argument('--format', choices=list(FORMATS), help='Defaults to the file extension, or csv.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or (Path(path).suffix.lstrip('.').lower() if path != '-' else 'csv')
+        if fmt not in FORMATS:
+            raise CommandError(f'Cannot tell the format of {path!r}, pass --format.')
+
+        stream = sys.stdout if path == '-' else open(path, 'w', newline='', encoding='utf-8')
+        try:
+            stream.writelines(export_menu(fmt))
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
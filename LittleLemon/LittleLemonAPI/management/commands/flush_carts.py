@@ -0,0 +1,29 @@
+"""
+---------------------------------------------------------------------
+Django Custom Management Command: flush_carts
+---------------------------------------------------------------------
+
+Writes behind every cached cart changed since the last flush into the
+Cart table. Only useful when CART_STORAGE = 'cache'; run it periodically
+(e.g. from cron) so that Cart rows never lag far behind Redis.
+
+Usage:
+    python manage.py flush_carts
+---------------------------------------------------------------------
+"""
+
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+from LittleLemonAPI.carts import CachedCartStore
+
+class Command(BaseCommand):
+    help = 'Write cached carts behind to the Cart table'
+
+    def handle(self, *args, **kwargs):
+        try:
+            store = CachedCartStore()
+        except ImproperlyConfigured as exc:
+            raise CommandError(exc)
+        flushed = store.flush()
+        self.stdout.write(self.style.SUCCESS(f'{flushed} cart(s) written behind.'))
@@ -0,0 +1,50 @@
+"""
+---------------------------------------------------------------------
+Django Custom Management Command: import_menu
+---------------------------------------------------------------------
+
+Upserts menu items (and creates missing categories) from a CSV or JSON
+Lines file, streaming it in chunks inside one transaction. See
+LittleLemonAPI/catalog.py for the expected fields.
+
+Usage:
+    python manage.py import_menu menu.csv
+    python manage.py import_menu menu.jsonl
+    cat menu.jsonl | python manage.py import_menu - --format jsonl
+---------------------------------------------------------------------
+"""
+
+
+import csv
+import sys
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from LittleLemonAPI.catalog import FORMATS, import_menu, read_rows
+
+class Command(BaseCommand):
+    help = 'Bulk import menu items from a CSV or JSON Lines file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, or '-' for standard input.")
+        parser.add_argument('--format', choices=list(FORMATS), help='Defaults to the file extension.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or Path(path).suffix.lstrip('.').lower()
+        if fmt not in FORMATS:
+            raise CommandError(f'Cannot tell the format of {path!r}, pass --format.')
+
+        stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        try:
+            result = import_menu(read_rows(stream, fmt))
+        except (ValueError, csv.Error) as exc:
+            # Invalid rows (CatalogImportError) as well as malformed CSV, JSON or UTF-8.
+            raise CommandError(str(exc))
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['items']} menu item(s) imported, {result['categories_created']} categorie(s) created."
+        ))
@@ -0,0 +1,74 @@
+"""
+---------------------------------------------------------------------
+Django Custom Management Command: profiles
+---------------------------------------------------------------------
+
+Lists and summarizes the request profiles captured by the profiling
+middleware (see LittleLemonAPI/profiling.py).
+
+Usage:
+    python manage.py profiles                 # list the captured profiles
+    python manage.py profiles <id>            # top functions and SQL of one profile
+    python manage.py profiles <id> --sort tottime --limit 40
+---------------------------------------------------------------------
+"""
+
+
+import io
+import pstats
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from LittleLemonAPI.profiling import list_profiles, load_metadata, profile_dir
+
+class Command(BaseCommand):
+    help = 'List and summarize captured request profiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('profile_id', nargs='?', help='Profile to summarize; lists all profiles if omitted.')
+        parser.add_argument('--sort', default='cumulative', help='pstats sort key (cumulative, tottime, calls...).')
+        parser.add_argument('--limit', type=int, default=25, help='Functions and SQL statements to show.')
+
+    def handle(self, *args, **options):
+        if options['profile_id']:
+            self.summarize(options['profile_id'], options['sort'], options['limit'])
+        else:
+            self.list()
+
+    def list(self):
+        profile_ids = list_profiles()
+        if not profile_ids:
+            self.stdout.write(f'No profiles in {profile_dir()}.')
+            return
+        for profile_id in reversed(profile_ids):
+            meta = load_metadata(profile_id)
+            self.stdout.write(
+                f"{profile_id}  {meta['method']} {meta['path']}  {meta['status']}  "
+                f"{meta['seconds'] * 1000:.1f} ms  {len(meta['queries']) + meta['queries_dropped']} queries"
+            )
+
+    def summarize(self, profile_id, sort, limit):
+        if profile_id not in list_profiles():
+            raise CommandError(f'No profile {profile_id!r}.')
+        meta = load_metadata(profile_id)
+        query_seconds = sum(query['seconds'] for query in meta['queries'])
+        self.stdout.write(self.style.MIGRATE_HEADING(f"{meta['method']} {meta['path']}?{meta['query_string']}"))
+        self.stdout.write(
+            f"Status {meta['status']}, {meta['seconds'] * 1000:.1f} ms total, "
+            f"{len(meta['queries'])} queries in {query_seconds * 1000:.1f} ms"
+            + (f" ({meta['queries_dropped']} more not recorded)" if meta['queries_dropped'] else '')
+        )
+
+        self.stdout.write(self.style.MIGRATE_HEADING('\nTop functions'))
+        output = io.StringIO()
+        stats = pstats.Stats(str(profile_dir() / f'{profile_id}.pstats'), stream=output)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        self.stdout.write(output.getvalue(), ending='')
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Top SQL (by total time)'))
+        by_sql = defaultdict(lambda: [0, 0.0])
+        for query in meta['queries']:
+            by_sql[query['sql']][0] += 1
+            by_sql[query['sql']][1] += query['seconds']
+        for sql, (count, seconds) in sorted(by_sql.items(), key=lambda item: -item[1][1])[:limit]:
+            self.stdout.write(f'{seconds * 1000:8.1f} ms  x{count:<4} {sql}')
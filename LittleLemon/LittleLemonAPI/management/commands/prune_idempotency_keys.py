@@ -0,0 +1,24 @@
+"""
+---------------------------------------------------------------------
+Django Custom Management Command: prune_idempotency_keys
+---------------------------------------------------------------------
+
+Deletes idempotency keys older than IDEMPOTENCY_TTL. Retries sent with
+an expired key run again anyway, so these rows are no longer needed.
+
+Usage:
+    python manage.py prune_idempotency_keys
+---------------------------------------------------------------------
+"""
+
+
+from django.core.management.base import BaseCommand
+from LittleLemonAPI.models import IdempotencyKey
+from LittleLemonAPI.idempotency import expiry_horizon
+
+class Command(BaseCommand):
+    help = 'Delete idempotency keys past IDEMPOTENCY_TTL'
+
+    def handle(self, *args, **kwargs):
+        deleted, _ = IdempotencyKey.objects.filter(created__lt=expiry_horizon()).delete()
+        self.stdout.write(self.style.SUCCESS(f'{deleted} idempotency key(s) deleted.'))
@@ -0,0 +1,25 @@
+"""
+---------------------------------------------------------------------
+Django Custom Management Command: prune_tombstones
+---------------------------------------------------------------------
+
+Deletes order tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS.
+Clients whose sync cursor is older than that are told to sync their
+full order list again, so these tombstones are no longer needed.
+
+Usage:
+    python manage.py prune_tombstones
+---------------------------------------------------------------------
+"""
+
+
+from django.core.management.base import BaseCommand
+from LittleLemonAPI.models import OrderTombstone
+from LittleLemonAPI.sync import retention_horizon
+
+class Command(BaseCommand):
+    help = 'Delete order tombstones past the sync retention period'
+
+    def handle(self, *args, **kwargs):
+        deleted, _ = OrderTombstone.objects.filter(deleted_at__lt=retention_horizon()).delete()
+        self.stdout.write(self.style.SUCCESS(f'{deleted} tombstone(s) deleted.'))
@@ -0,0 +1,62 @@
+"""
+---------------------------------------------------------------------
+Django Custom Management Command: reconcile_order_summaries
+---------------------------------------------------------------------
+
+Checks the per-user order summary counters against the Order table,
+computed in bulk with one aggregate query per role, and reports the
+users whose counters drifted. Exits with an error if any did, so it
+can run from cron or monitoring.
+
+With --rebuild, every counter is rebuilt from the Order table in one
+transaction instead. Best run when few orders are being written.
+
+Usage:
+    python manage.py reconcile_order_summaries
+    python manage.py reconcile_order_summaries --rebuild
+---------------------------------------------------------------------
+"""
+
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from LittleLemonAPI.models import OrderSummary
+from LittleLemonAPI.summaries import FIELDS, expected_summaries
+
+class Command(BaseCommand):
+    help = 'Check the order summary counters for drift, or rebuild them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help='Rebuild every counter from the Order table.')
+        parser.add_argument('--show', type=int, default=20, help='Drifted users to print.')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            self.rebuild()
+            return
+
+        expected = expected_summaries()
+        zero = dict.fromkeys(FIELDS, 0)
+        drifted = []
+        for row in OrderSummary.objects.values('user_id', *FIELDS).iterator():
+            user_id = row.pop('user_id')
+            if row != expected.pop(user_id, zero):
+                drifted.append(user_id)
+        # Users with orders but no counters at all.
+        drifted.extend(user_id for user_id, values in expected.items() if values != zero)
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS('Order summaries are consistent.'))
+            return
+        shown = ', '.join(str(user_id) for user_id in drifted[:options['show']])
+        raise CommandError(f'{len(drifted)} user(s) with drifted order summaries: {shown}. Run with --rebuild to fix.')
+
+    @transaction.atomic
+    def rebuild(self):
+        expected = expected_summaries()
+        OrderSummary.objects.all().delete()
+        OrderSummary.objects.bulk_create(
+            (OrderSummary(user_id=user_id, **values) for user_id, values in expected.items()),
+            batch_size=1000,
+        )
+        self.stdout.write(self.style.SUCCESS(f'Order summaries rebuilt for {len(expected)} user(s).'))
@@ -0,0 +1,31 @@
+"""
+---------------------------------------------------------------------
+Django Custom Management Command: reprice_carts
+---------------------------------------------------------------------
+
+Reprices every open cart line to the current MenuItem price with one
+set-based UPDATE. Use it after prices were changed in bulk (e.g. with
+QuerySet.update() or raw SQL), which does not reprice carts by itself.
+
+Usage:
+    python manage.py reprice_carts
+    python manage.py reprice_carts --menuitem 3 --menuitem 7
+---------------------------------------------------------------------
+"""
+
+
+from django.core.management.base import BaseCommand
+from LittleLemonAPI.pricing import reprice_carts
+
+class Command(BaseCommand):
+    help = 'Reprice open carts to the current menu prices'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--menuitem', type=int, action='append', dest='menuitems',
+            help='Only reprice carts holding this menu item (repeatable).',
+        )
+
+    def handle(self, *args, **options):
+        repriced = reprice_carts(options['menuitems'])
+        self.stdout.write(self.style.SUCCESS(f'{repriced} cart line(s) repriced.'))
@@ -0,0 +1,43 @@
+"""
+---------------------------------------------------------------------
+Django Custom Management Command: set_stock
+---------------------------------------------------------------------
+
+Sets the stock of a menu item, optionally spreading it over several
+shards for hot items that many customers order at the same time (see
+LittleLemonAPI/inventory.py).
+
+Usage:
+    python manage.py set_stock <menuitem_id> 40
+    python manage.py set_stock <menuitem_id> 200 --shards 8
+    python manage.py set_stock <menuitem_id> none      # stop tracking stock
+---------------------------------------------------------------------
+"""
+
+
+from django.core.management.base import BaseCommand, CommandError
+from LittleLemonAPI.inventory import available, set_stock
+from LittleLemonAPI.models import MenuItem
+
+class Command(BaseCommand):
+    help = 'Set the stock of a menu item'
+
+    def add_arguments(self, parser):
+        parser.add_argument('menuitem', type=int, help='Menu item id.')
+        parser.add_argument('quantity', help="New stock, or 'none' to stop tracking it.")
+        parser.add_argument('--shards', type=int, help='Spread the stock over this many shards (0 for none). Keeps the current sharding if omitted.')
+
+    def handle(self, *args, **options):
+        try:
+            menuitem = MenuItem.objects.get(pk=options['menuitem'])
+        except MenuItem.DoesNotExist:
+            raise CommandError(f"No menu item {options['menuitem']}.")
+        quantity = None if options['quantity'].lower() == 'none' else int(options['quantity'])
+        if (quantity is not None and quantity < 0) or (options['shards'] or 0) < 0:
+            raise CommandError('Stock and shards cannot be negative.')
+
+        set_stock(menuitem, quantity, options['shards'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{menuitem.title}: stock {available(menuitem)}'
+            + (f' over {menuitem.stock_shards} shard(s)' if menuitem.stock_shards else '')
+        ))
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.1 on 2026-10-19 10:38
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.utils.text import slugify
+
+
+def _unique(value, taken, suffix, max_length):
+    """Return `value` with the first free suffix (2, 3...) appended."""
+    number = 2
+    while True:
+        end = suffix.format(number)
+        candidate = value[:max_length - len(end)] + end
+        if candidate not in taken:
+            taken.add(candidate)
+            return candidate
+        number += 1
+
+
+def rename_duplicates(apps, schema_editor):
+    """
+    Make existing menu item titles and category slugs unique before the
+    constraints are added: the oldest row keeps its value, the others get a
+    numbered suffix ("Pasta (2)", "mains-2"). Rows are renamed rather than
+    merged or deleted so that carts and orders pointing at them are kept.
+    """
+    MenuItem = apps.get_model('LittleLemonAPI', 'MenuItem')
+    Category = apps.get_model('LittleLemonAPI', 'Category')
+
+    duplicated = MenuItem.objects.values('title').annotate(count=Count('id')).filter(count__gt=1)
+    if duplicated:
+        taken = set(MenuItem.objects.values_list('title', flat=True))
+        for title in duplicated.values_list('title', flat=True):
+            for item in MenuItem.objects.filter(title=title).order_by('id')[1:]:
+                item.title = _unique(title, taken, ' ({})', 255)
+                item.save(update_fields=['title'])
+
+    taken = set(Category.objects.exclude(slug='').values_list('slug', flat=True))
+    seen = set()
+    for category in Category.objects.order_by('id'):
+        if category.slug and category.slug not in seen:
+            seen.add(category.slug)
+            continue
+        slug = category.slug or slugify(category.title) or 'category'
+        if slug in taken:
+            slug = _unique(slug, taken, '-{}', 50)
+        taken.add(slug)
+        seen.add(slug)
+        category.slug = slug
+        category.save(update_fields=['slug'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('LittleLemonAPI', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(rename_duplicates, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='category',
+            name='slug',
+            field=models.SlugField(blank=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='menuitem',
+            name='title',
+            field=models.CharField(max_length=255, unique=True),
+        ),
+    ]
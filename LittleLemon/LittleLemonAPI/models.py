@@ -13,6 +13,8 @@ database.
 
 from django.db import models
 from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
 from django.utils.text import slugify
 
 
@@ -40,16 +42,59 @@ class MenuItem(models.Model):
     """
     MenuItem model to store individual items available for purchase in the restaurant.
     Each item belongs to a specific category (e.g., appetizers or main course) and has a price.
+    The title is unique so that bulk catalog imports can upsert items by title.
+    Stock is optional: None means the item is not tracked and never runs out. Hot items can
+    spread their stock over several StockShard rows (stock_shards > 0), see inventory.py.
     """
-    title = models.CharField(max_length=255)
+    title = models.CharField(max_length=255, unique=True)
     price = models.DecimalField(max_digits=6, decimal_places=2)
     category = models.ForeignKey(Category, on_delete=models.PROTECT)  # Protect: Prevent deletion of category
     featured = models.BooleanField(default=False)  # Whether the menu item is featured on the menu
+    stock = models.PositiveIntegerField(null=True, blank=True)  # None = not tracked; unused when sharded
+    stock_shards = models.PositiveSmallIntegerField(default=0)  # 0 = stock kept in the stock field
+
+    # Written only by inventory.py, with UPDATEs that ordinary saves must not undo
+    INVENTORY_FIELDS = ('stock', 'stock_shards')
+
+    def save(self, *args, **kwargs):
+        """
+        Saving an existing item leaves its stock alone unless update_fields asks for
+        it: checkouts decrement the stock in the database, so the copy held by a
+        price change or an admin edit is stale. Use inventory.set_stock() instead.
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.INVENTORY_FIELDS and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the price as loaded so that price changes can be detected on save."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_price = instance.__dict__.get('price')
+        return instance
 
     def __str__(self):
         return self.title
 
 
+class StockShard(models.Model):
+    """
+    StockShard model holding one slice of a hot menu item's stock, so that concurrent
+    checkouts decrement different rows instead of all contending for the MenuItem row.
+    """
+    menuitem = models.ForeignKey(MenuItem, on_delete=models.CASCADE, related_name='shards')
+    shard = models.PositiveSmallIntegerField()
+    stock = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        """Each shard number appears once per menu item."""
+        unique_together = ('menuitem', 'shard')
+
+
 class Cart(models.Model):
     """
     Cart model for storing the user's selected menu items before placing an order.
@@ -70,12 +115,21 @@ class Order(models.Model):
     """
     Order model to store customer orders. Each order has an associated user and can be delivered by a crew member.
     The status indicates whether the order has been delivered (True = delivered, False = not delivered).
+    updated_at changes on every write to the order or its items, so clients can sync only what changed.
     """
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     delivery_crew = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='deliveries', blank=True)
-    status = models.BooleanField(default=False)  # False = not delivered
+    status = models.BooleanField(default=False, db_index=True)  # False = not delivered
     total = models.DecimalField(max_digits=6, decimal_places=2)
-    date = models.DateField(auto_now_add=True)  # Automatically set the order creation date
+    date = models.DateField(auto_now_add=True, db_index=True)  # Automatically set the order creation date
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        """Delta syncs look up the changes of one customer or one crew member."""
+        indexes = [
+            models.Index(fields=['user', 'updated_at']),
+            models.Index(fields=['delivery_crew', 'updated_at']),
+        ]
 
     def __str__(self):
         return f"Order {self.id} by {self.user.username}"
@@ -91,10 +145,84 @@ class OrderItem(models.Model):
     quantity = models.PositiveIntegerField()
     unit_price = models.DecimalField(max_digits=6, decimal_places=2)
     price = models.DecimalField(max_digits=6, decimal_places=2)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         """Ensure that a menu item can only appear once in an order."""
         unique_together = ('order', 'menuitem')
 
+    def save(self, *args, **kwargs):
+        """Override the save method to mark the order as changed too."""
+        super().save(*args, **kwargs)
+        Order.objects.filter(pk=self.order_id).update(updated_at=timezone.now())
+
+    def delete(self, *args, **kwargs):
+        """Override the delete method to mark the order as changed too."""
+        result = super().delete(*args, **kwargs)
+        Order.objects.filter(pk=self.order_id).update(updated_at=timezone.now())
+        return result
+
+    def __str__(self):
+        return f"{self.quantity} x {self.menuitem.title} (Order {self.order_id})"
+
+
+class OrderTombstone(models.Model):
+    """
+    OrderTombstone model to tell syncing clients that an order left their list.
+    Written when an order is deleted (order_deleted = True, visible to everyone who could
+    see the order) or when a customer or crew member loses access to an order that still
+    exists (order_deleted = False, visible only to that user).
+    """
+    order_id = models.BigIntegerField()
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    delivery_crew = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    order_deleted = models.BooleanField(default=True)
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'deleted_at']),
+            models.Index(fields=['delivery_crew', 'deleted_at']),
+        ]
+
+    def __str__(self):
+        return f"Order {self.order_id} removed at {self.deleted_at}"
+
+
+
+class OrderSummary(models.Model):
+    """
+    OrderSummary model holding per-user order counters, kept up to date on every order write
+    so that clients don't have to fetch and sum all orders (see summaries.py).
+    The customer counters cover the user's own orders; the delivery counters cover the orders
+    assigned to the user as a delivery crew member.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='order_summary')
+    order_count = models.IntegerField(default=0)
+    lifetime_spend = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    open_orders = models.IntegerField(default=0)  # Own orders not delivered yet
+    delivery_count = models.IntegerField(default=0)
+    open_deliveries = models.IntegerField(default=0)  # Assigned orders not delivered yet
+
+    def __str__(self):
+        return f"Order summary of {self.user_id}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    IdempotencyKey model recording a write sent with an Idempotency-Key header (see idempotency.py).
+    The unique (user, key) row is the lock that lets only one of several concurrent duplicates run;
+    status is NULL while it runs, then the response is kept for replaying retries.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    key = models.CharField(max_length=64)  # SHA-256 of the client's key
+    fingerprint = models.CharField(max_length=64)
+    status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        unique_together = ('user', 'key')
+
     def __str__(self):
-        return f"{self.quantity} x {self.menuitem.title} (Order {self.order.id})"
+        return f"Idempotency key {self.key[:8]} of {self.user_id}"
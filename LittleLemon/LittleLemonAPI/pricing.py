@@ -0,0 +1,48 @@
+"""
+---------------------------------------------------------------------
+Cart Repricing for the Little Lemon API
+---------------------------------------------------------------------
+
+Cart lines keep a snapshot of MenuItem.price (unit_price and price)
+taken when the item was added. When a menu price changes, the open
+carts holding that item are repriced here with a single set-based
+UPDATE, instead of loading and saving each cart line in Python.
+
+Cached carts (CART_STORAGE = 'cache') cannot be updated in place, so
+every repricing also bumps the menu version kept next to them in Redis;
+a cached cart saved under an older menu version reprices itself the next
+time it is read (see carts.py).
+
+---------------------------------------------------------------------
+"""
+
+from django.db import transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, OuterRef, Subquery
+
+from .carts import get_cart_store
+from .models import Cart, MenuItem
+
+
+def reprice_carts(menuitem_ids=None):
+    """
+    Bring Cart.unit_price and Cart.price in line with the current MenuItem
+    prices, for the given menu items or for the whole catalog if None.
+    Returns the number of cart lines repriced.
+    """
+    current_price = Subquery(
+        MenuItem.objects.filter(pk=OuterRef('menuitem_id')).values('price')[:1]
+    )
+    carts = Cart.objects.all()
+    if menuitem_ids is not None:
+        carts = carts.filter(menuitem_id__in=menuitem_ids)
+
+    repriced = carts.exclude(unit_price=current_price).update(
+        unit_price=current_price,
+        price=ExpressionWrapper(
+            current_price * F('quantity'),
+            output_field=DecimalField(max_digits=6, decimal_places=2),
+        ),
+    )
+    # Cached carts must not pick up the new version before the new prices commit.
+    transaction.on_commit(get_cart_store().menu_changed)
+    return repriced
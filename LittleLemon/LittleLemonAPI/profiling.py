@@ -0,0 +1,168 @@
+"""
+---------------------------------------------------------------------
+On-demand Request Profiling for the Little Lemon API
+---------------------------------------------------------------------
+
+Staff users can ask for any single request to be profiled by sending
+the 'X-Profile: 1' header or the '?profile=1' query parameter. The
+request then runs under cProfile, every SQL query it executes is
+recorded, and two files are written to PROFILING_DIR:
+
+- <id>.pstats: the profile, readable with pstats, snakeviz, or turned
+  into a flamegraph with flameprof / gprof2dot,
+- <id>.json: the request, response status, duration and SQL queries.
+  Only the SQL text is kept, never its parameters: they include secrets
+  such as the auth token looked up for the request.
+
+Only the PROFILING_MAX_FILES most recent profiles are kept (a ring
+buffer on disk). The response carries the profile id in 'X-Profile-Id'.
+List and summarize profiles with 'python manage.py profiles'.
+
+Requests from anyone else are served normally and never profiled.
+
+One request is profiled at a time per process: cProfile cannot run
+twice at once on Python 3.12+ (and there sees every thread), so a
+request asking for a profile while another one is being profiled is
+served unprofiled.
+
+---------------------------------------------------------------------
+"""
+
+import cProfile
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from contextlib import ExitStack
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_PARAM = 'profile'
+MAX_QUERIES = 1000  # Per profile, to keep the artifacts bounded
+
+_profiling = threading.Lock()
+
+
+def profile_dir():
+    return Path(settings.PROFILING_DIR)
+
+
+def list_profiles():
+    """Return the ids of the stored profiles, oldest first."""
+    directory = profile_dir()
+    if not directory.is_dir():
+        return []
+    return sorted(path.stem for path in directory.glob('*.pstats'))
+
+
+def load_metadata(profile_id):
+    with open(profile_dir() / f'{profile_id}.json') as file:
+        return json.load(file)
+
+
+def save_profile(profiler, metadata):
+    """Write a profile and its metadata, then drop the oldest ones beyond the limit."""
+    directory = profile_dir()
+    directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+    # Timestamp first so that ids sort chronologically.
+    slug = re.sub(r'[^A-Za-z0-9]+', '-', metadata['path']).strip('-')[:40] or 'root'
+    profile_id = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S%f}-{metadata['method'].lower()}-{slug}-{uuid.uuid4().hex[:6]}"
+
+    profiler.dump_stats(directory / f'{profile_id}.pstats')
+    with open(os.open(directory / f'{profile_id}.json', os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'w') as file:
+        json.dump({'id': profile_id, **metadata}, file, indent=1)
+
+    for stale in list_profiles()[:-settings.PROFILING_MAX_FILES]:
+        for suffix in ('.pstats', '.json'):
+            (directory / f'{stale}{suffix}').unlink(missing_ok=True)
+    return profile_id
+
+
+class QueryRecorder:
+    """Database execute wrapper that records each query (without its parameters) and how long it took."""
+    def __init__(self):
+        self.queries = []
+        self.dropped = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if len(self.queries) < MAX_QUERIES:
+                self.queries.append({
+                    'alias': context['connection'].alias,
+                    'sql': sql,
+                    'many': many,
+                    'seconds': time.perf_counter() - start,
+                })
+            else:
+                self.dropped += 1
+
+
+class ProfilingMiddleware:
+    """
+    Profiles the requests of staff users who ask for it.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self.wants_profile(request) or not self.is_staff(request):
+            return self.get_response(request)
+
+        if not _profiling.acquire(blocking=False):
+            return self.get_response(request)  # Another request is being profiled
+        try:
+            profiler = cProfile.Profile()
+            recorder = QueryRecorder()
+            start = time.perf_counter()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another profiling tool (a debugger, an outer profiler...) is active.
+                return self.get_response(request)
+            try:
+                with ExitStack() as stack:
+                    for connection in connections.all():
+                        stack.enter_context(connection.execute_wrapper(recorder))
+                    response = self.get_response(request)
+            finally:
+                profiler.disable()
+            duration = time.perf_counter() - start
+        finally:
+            _profiling.release()
+
+        response[f'{PROFILE_HEADER}-Id'] = save_profile(profiler, {
+            'method': request.method,
+            'path': request.path,
+            'query_string': request.META.get('QUERY_STRING', ''),
+            'status': response.status_code,
+            'seconds': duration,
+            'queries': recorder.queries,
+            'queries_dropped': recorder.dropped,
+        })
+        return response
+
+    def wants_profile(self, request):
+        return request.headers.get(PROFILE_HEADER) == '1' or request.GET.get(PROFILE_PARAM) == '1'
+
+    def is_staff(self, request):
+        # Admin session users are known here; token users are only
+        # authenticated inside the DRF view, so check their token now.
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_authenticated:
+            try:
+                user, _ = TokenAuthentication().authenticate(request) or (None, None)
+            except AuthenticationFailed:
+                return False
+        return bool(user and user.is_staff)
@@ -14,7 +14,7 @@ to control data representation and validation.
 
 
 from rest_framework import serializers
-from .models import Category, MenuItem, Cart, Order, OrderItem
+from .models import Category, MenuItem, Cart, Order, OrderItem, OrderSummary
 from django.contrib.auth.models import User
 
 # Serializer for the Category model
@@ -68,6 +68,13 @@ class OrderSerializer(serializers.ModelSerializer):
         fields = ['id', 'user', 'delivery_crew', 'status', 'total', 'date', 'order_items']
 
 
+# Serializer for the per-user order counters
+class OrderSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = OrderSummary
+        fields = ['user', 'order_count', 'lifetime_spend', 'open_orders', 'delivery_count', 'open_deliveries']
+
+
 # Basic serializer for the User model
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
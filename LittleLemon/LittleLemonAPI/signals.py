@@ -0,0 +1,32 @@
+"""
+---------------------------------------------------------------------
+Signal Handlers for the Little Lemon API
+---------------------------------------------------------------------
+
+Connected when the app is ready (see apps.py).
+
+- reprice_carts_on_price_change:
+    Reprices open carts whenever a saved MenuItem changes price, whether
+    the change comes from MenuItemDetailView, the admin or the shell.
+    Bulk QuerySet.update() calls bypass this and must call
+    pricing.reprice_carts() themselves.
+
+---------------------------------------------------------------------
+"""
+
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import MenuItem
+from .pricing import reprice_carts
+
+
+@receiver(post_save, sender=MenuItem)
+def reprice_carts_on_price_change(sender, instance, created, raw, **kwargs):
+    loaded_price = getattr(instance, '_loaded_price', None)
+    # Remembered first, so that a later save() of a just-created instance is compared too.
+    instance._loaded_price = instance.price
+    if created or raw:
+        return
+    if loaded_price is not None and loaded_price != instance.price:
+        reprice_carts([instance.pk])
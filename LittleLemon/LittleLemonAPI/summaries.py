@@ -0,0 +1,143 @@
+"""
+---------------------------------------------------------------------
+Order Summary Counters for the Little Lemon API
+---------------------------------------------------------------------
+
+Keeps the OrderSummary counters (order count, lifetime spend, open
+orders, deliveries, open deliveries) in step with the Order table.
+Every order write computes what the order contributed to each user's
+counters before and after, and applies the difference with F()
+expressions, in the same transaction as the write:
+
+    before = snapshot(order)
+    ...change and save the order...
+    record_change(before, snapshot(order))
+
+Admin bulk actions use the record_bulk_* helpers, which aggregate the
+affected orders per user instead of walking them one by one.
+
+Writes that bypass these helpers (raw SQL, cascades from deleting a
+user...) make the counters drift; reconcile_order_summaries detects
+that and rebuilds them from the Order table.
+
+---------------------------------------------------------------------
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+
+from .models import Order, OrderSummary
+
+
+FIELDS = ['order_count', 'lifetime_spend', 'open_orders', 'delivery_count', 'open_deliveries']
+
+
+def snapshot(order):
+    """The parts of an order the counters depend on (None for no order)."""
+    if order is None:
+        return None
+    return (order.user_id, order.delivery_crew_id, Decimal(str(order.total)), bool(order.status))
+
+
+def _contributions(state, sign, deltas):
+    if state is None:
+        return
+    user_id, delivery_crew_id, total, delivered = state
+    deltas[user_id]['order_count'] += sign
+    deltas[user_id]['lifetime_spend'] += sign * total
+    deltas[user_id]['open_orders'] += sign * (not delivered)
+    if delivery_crew_id is not None:
+        deltas[delivery_crew_id]['delivery_count'] += sign
+        deltas[delivery_crew_id]['open_deliveries'] += sign * (not delivered)
+
+
+def record_change(before, after):
+    """Apply the counter changes of one order going from snapshot before to after."""
+    deltas = defaultdict(lambda: defaultdict(int))
+    _contributions(before, -1, deltas)
+    _contributions(after, 1, deltas)
+    apply_deltas(deltas)
+
+
+def apply_deltas(deltas):
+    """Add {user_id: {field: delta}} to the counters, creating missing rows."""
+    for user_id, changes in deltas.items():
+        changes = {field: value for field, value in changes.items() if value}
+        if not changes:
+            continue
+        increments = {field: F(field) + value for field, value in changes.items()}
+        if OrderSummary.objects.filter(user_id=user_id).update(**increments):
+            continue
+        try:
+            with transaction.atomic():
+                OrderSummary.objects.create(user_id=user_id, **changes)
+        except IntegrityError:
+            # Created by a concurrent write in the meantime.
+            OrderSummary.objects.filter(user_id=user_id).update(**increments)
+
+
+def _grouped(orders, field, **aggregates):
+    return orders.order_by().values_list(field).annotate(**aggregates).values_list(field, *aggregates)
+
+
+def record_bulk_delivered(orders):
+    """Call before marking a queryset of orders as delivered."""
+    open_orders = orders.filter(status=False)
+    deltas = defaultdict(lambda: defaultdict(int))
+    for user_id, count in _grouped(open_orders, 'user', count=Count('id')):
+        deltas[user_id]['open_orders'] -= count
+    for crew_id, count in _grouped(open_orders.filter(delivery_crew__isnull=False), 'delivery_crew', count=Count('id')):
+        deltas[crew_id]['open_deliveries'] -= count
+    apply_deltas(deltas)
+
+
+def record_bulk_reassigned(orders, delivery_crew_id):
+    """Call before assigning a queryset of orders to another crew member."""
+    moving = orders.exclude(delivery_crew_id=delivery_crew_id)
+    aggregates = {'count': Count('id'), 'open': Count('id', filter=Q(status=False))}
+    deltas = defaultdict(lambda: defaultdict(int))
+    for crew_id, count, open_count in _grouped(moving.filter(delivery_crew__isnull=False), 'delivery_crew', **aggregates):
+        deltas[crew_id]['delivery_count'] -= count
+        deltas[crew_id]['open_deliveries'] -= open_count
+    totals = moving.aggregate(**aggregates)
+    deltas[delivery_crew_id]['delivery_count'] += totals['count']
+    deltas[delivery_crew_id]['open_deliveries'] += totals['open']
+    apply_deltas(deltas)
+
+
+def record_bulk_deleted(orders):
+    """Call before deleting a queryset of orders."""
+    deltas = defaultdict(lambda: defaultdict(int))
+    customer_aggregates = {
+        'count': Count('id'), 'spend': Sum('total'), 'open': Count('id', filter=Q(status=False)),
+    }
+    for user_id, count, spend, open_count in _grouped(orders, 'user', **customer_aggregates):
+        deltas[user_id]['order_count'] -= count
+        deltas[user_id]['lifetime_spend'] -= spend
+        deltas[user_id]['open_orders'] -= open_count
+    crew_aggregates = {'count': Count('id'), 'open': Count('id', filter=Q(status=False))}
+    for crew_id, count, open_count in _grouped(orders.filter(delivery_crew__isnull=False), 'delivery_crew', **crew_aggregates):
+        deltas[crew_id]['delivery_count'] -= count
+        deltas[crew_id]['open_deliveries'] -= open_count
+    apply_deltas(deltas)
+
+
+def expected_summaries():
+    """Compute every user's counters from the Order table: {user_id: {field: value}}."""
+    expected = defaultdict(lambda: dict.fromkeys(FIELDS, 0))
+    customers = _grouped(
+        Order.objects.all(), 'user',
+        order_count=Count('id'), lifetime_spend=Sum('total'), open_orders=Count('id', filter=Q(status=False)),
+    )
+    for user_id, order_count, lifetime_spend, open_orders in customers:
+        expected[user_id].update(order_count=order_count, lifetime_spend=lifetime_spend, open_orders=open_orders)
+    crews = _grouped(
+        Order.objects.filter(delivery_crew__isnull=False), 'delivery_crew',
+        delivery_count=Count('id'), open_deliveries=Count('id', filter=Q(status=False)),
+    )
+    for crew_id, delivery_count, open_deliveries in crews:
+        expected[crew_id].update(delivery_count=delivery_count, open_deliveries=open_deliveries)
+    return expected
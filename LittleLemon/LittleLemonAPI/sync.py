@@ -0,0 +1,94 @@
+"""
+---------------------------------------------------------------------
+Incremental Order Sync for the Little Lemon API
+---------------------------------------------------------------------
+
+Lets customers and delivery crews refresh their order list with only
+what changed since their last sync, instead of downloading it all:
+
+    GET /api/orders/                 -> full list, plus an X-Sync-Cursor header
+    GET /api/orders/?since=<cursor>  -> {"cursor": ..., "orders": [...], "deleted": [...]}
+
+- 'orders' holds every order of the user's list whose updated_at is at
+  or after the cursor (Order.updated_at is bumped on every write to the
+  order or its items).
+- 'deleted' holds the ids of orders that left the list: deleted orders
+  and orders the user lost access to (e.g. reassigned to another crew
+  member), recorded as OrderTombstone rows.
+
+Clients apply 'deleted' first and then upsert 'orders', and keep the
+returned cursor for the next sync. The cursor is set a few seconds
+(SYNC_CURSOR_OVERLAP) in the past so that writes committing while the
+sync runs are not missed; an order may therefore come back twice.
+
+Tombstones are kept for SYNC_TOMBSTONE_RETENTION_DAYS (see the
+prune_tombstones command). Older cursors get 410 Gone and the client
+must do a full sync again.
+
+---------------------------------------------------------------------
+"""
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import OrderTombstone
+
+
+class CursorExpired(ValueError):
+    """The cursor predates the retained tombstones; a full sync is needed."""
+
+
+def current_cursor():
+    """Cursor to hand out with a sync that starts now."""
+    return encode_cursor(timezone.now() - timedelta(seconds=settings.SYNC_CURSOR_OVERLAP))
+
+
+def encode_cursor(moment):
+    """Cursors are opaque to clients: microseconds since the epoch."""
+    return str(int(moment.timestamp() * 1_000_000))
+
+
+def decode_cursor(cursor):
+    """Return the datetime of a cursor; raises ValueError if malformed, CursorExpired if too old."""
+    moment = datetime.fromtimestamp(int(cursor) / 1_000_000, tz=dt_timezone.utc)
+    if moment < retention_horizon():
+        raise CursorExpired('Cursor expired, sync the full list again')
+    return moment
+
+
+def retention_horizon():
+    return timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+
+
+def record_deletions(orders):
+    """Record tombstones for orders about to be deleted (an iterable of Order)."""
+    OrderTombstone.objects.bulk_create(
+        OrderTombstone(order_id=order.id, user_id=order.user_id, delivery_crew_id=order.delivery_crew_id)
+        for order in orders
+    )
+
+
+def record_lost_access(order_id, user_id=None, delivery_crew_id=None):
+    """Record that a customer or crew member can no longer see an existing order."""
+    if user_id is None and delivery_crew_id is None:
+        return
+    OrderTombstone.objects.create(
+        order_id=order_id, user_id=user_id, delivery_crew_id=delivery_crew_id, order_deleted=False,
+    )
+
+
+def record_reassignments(orders, delivery_crew_id):
+    """
+    Record tombstones for the previous crew of orders about to be assigned to
+    another crew member (orders is a queryset).
+    """
+    OrderTombstone.objects.bulk_create(
+        OrderTombstone(order_id=order_id, delivery_crew_id=previous_crew_id, order_deleted=False)
+        for order_id, previous_crew_id in (
+            orders.exclude(delivery_crew_id=delivery_crew_id)
+            .filter(delivery_crew__isnull=False)
+            .values_list('id', 'delivery_crew_id')
+        )
+    )
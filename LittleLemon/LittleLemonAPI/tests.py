@@ -1,3 +1,537 @@
-from django.test import TestCase
+import hashlib
+import os
+import tempfile
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.contrib.auth.models import User, Group
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from . import inventory, profiling, sync
+from .admin import OrderAdmin
+from .carts import CachedCartStore, CART_KEY, DIRTY_KEY
+from .models import Category, MenuItem, Cart, Order, OrderSummary, OrderTombstone, IdempotencyKey
+from .pricing import reprice_carts
+from .profiling import list_profiles
+
+
+# Cache-mode cart tests need a Redis server; point this at a scratch database.
+TEST_REDIS_URL = os.environ.get('TEST_CART_REDIS_URL', 'redis://localhost:6379/15')
+
+
+def redis_available():
+    try:
+        import redis
+        return redis.Redis.from_url(TEST_REDIS_URL).ping()
+    except Exception:
+        return False
+
+
+requires_redis = skipUnless(redis_available(), f'no Redis server at {TEST_REDIS_URL}')
+
+
+class MenuFixtureMixin:
+    def setUp(self):
+        super().setUp()
+        for name in ('Manager', 'Delivery Crew'):
+            Group.objects.get_or_create(name=name)
+        self.customer = User.objects.create_user('customer', password='secret')
+        self.client = APIClient()
+        self.client.force_authenticate(self.customer)
+        self.category = Category.objects.create(title='Mains', slug='mains')
+        self.pasta = MenuItem.objects.create(title='Pasta', price='5.00', category=self.category)
+        self.salad = MenuItem.objects.create(title='Salad', price='2.50', category=self.category)
+
+
+class LittleLemonTestCase(MenuFixtureMixin, TestCase):
+    pass
+
+
+class CachedCartMixin:
+    def setUp(self):
+        super().setUp()
+        import redis
+        self.redis = redis.Redis.from_url(TEST_REDIS_URL, decode_responses=True)
+        self.redis.flushdb()
+        settings_override = override_settings(CART_STORAGE='cache', CART_REDIS_URL=TEST_REDIS_URL)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(self.redis.flushdb)
+
+
+@requires_redis
+class CachedCartStoreTests(CachedCartMixin, LittleLemonTestCase):
+    def test_cart_is_written_behind_on_read(self):
+        self.client.post('/api/cart/', {'menuitem': self.pasta.id, 'quantity': 2})
+        self.assertFalse(Cart.objects.exists())
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.get('/api/cart/')
+        self.assertEqual(response.json()[0]['price'], '10.00')
+        self.assertEqual(Cart.objects.get().quantity, 2)
+
+    def test_cold_cart_keeps_lines_written_behind(self):
+        Cart.objects.create(user=self.customer, menuitem=self.pasta, quantity=1, unit_price='5.00', price='5.00')
+        self.client.post('/api/cart/', {'menuitem': self.salad.id, 'quantity': 1})
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.get('/api/cart/')
+        self.assertEqual(sorted(line['menuitem'] for line in response.json()), ['Pasta', 'Salad'])
+
+    def test_failed_flush_keeps_remaining_carts_dirty(self):
+        other = User.objects.create_user('other')
+        store = CachedCartStore()
+        store.add(self.customer, self.pasta, 1)
+        store.add(other, self.salad, 1)
+        with mock.patch.object(CachedCartStore, 'materialize', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                store.flush()
+        self.assertEqual(self.redis.scard(DIRTY_KEY), 2)
+        self.assertEqual(store.flush(), 2)
+        self.assertEqual(Cart.objects.count(), 2)
+
+
+@requires_redis
+class CachedCartConcurrencyTests(CachedCartMixin, MenuFixtureMixin, TransactionTestCase):
+    def test_concurrent_adds_keep_every_line(self):
+        items = [
+            MenuItem.objects.create(title=f'Dish {i}', price='1.00', category=self.category)
+            for i in range(20)
+        ]
+
+        def add(menuitem):
+            CachedCartStore().add(self.customer, menuitem, 1)
+            connection.close()
+
+        threads = [threading.Thread(target=add, args=(menuitem,)) for menuitem in items]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(CachedCartStore().lines(self.customer)), 20)
+
+
+class CartViewTests(LittleLemonTestCase):
+    def test_quantity_must_be_positive(self):
+        for quantity in (0, -1, 'two', ''):
+            response = self.client.post('/api/cart/', {'menuitem': self.pasta.id, 'quantity': quantity})
+            self.assertEqual(response.status_code, 400, quantity)
+        self.assertFalse(Cart.objects.exists())
+        self.assertEqual(self.client.get('/api/cart/').json(), [])
+
+
+@requires_redis
+class CachedCartViewTests(CachedCartMixin, CartViewTests):
+    pass
+
+
+class IdempotencyTests(LittleLemonTestCase):
+    def test_retry_replays_the_first_response(self):
+        self.client.post('/api/cart/', {'menuitem': self.pasta.id, 'quantity': 1})
+        first = self.client.post('/api/orders/', HTTP_IDEMPOTENCY_KEY='checkout-1')
+        retry = self.client.post('/api/orders/', HTTP_IDEMPOTENCY_KEY='checkout-1')
+        self.assertEqual((first.status_code, retry.status_code), (201, 201))
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_key_reused_for_another_request_is_rejected(self):
+        self.client.post('/api/cart/', {'menuitem': self.pasta.id, 'quantity': 1}, HTTP_IDEMPOTENCY_KEY='add')
+        response = self.client.post('/api/cart/', {'menuitem': self.pasta.id, 'quantity': 2}, HTTP_IDEMPOTENCY_KEY='add')
+        self.assertEqual(response.status_code, 422)
+
+    def test_abandoned_and_expired_keys_are_reused(self):
+        self.client.post('/api/cart/', {'menuitem': self.pasta.id, 'quantity': 1})
+        for key, status in (('abandoned', None), ('expired', 201)):
+            record = IdempotencyKey.objects.create(
+                user=self.customer, key=hashlib.sha256(key.encode()).hexdigest(), fingerprint='other', status=status,
+            )
+            IdempotencyKey.objects.filter(pk=record.pk).update(created=timezone.now() - timedelta(days=2))
+        self.assertEqual(self.client.post('/api/orders/', HTTP_IDEMPOTENCY_KEY='abandoned').status_code, 201)
+        self.client.post('/api/cart/', {'menuitem': self.pasta.id, 'quantity': 1})
+        self.assertEqual(self.client.post('/api/orders/', HTTP_IDEMPOTENCY_KEY='expired').status_code, 201)
+
+
+class IdempotencyConcurrencyTests(MenuFixtureMixin, TransactionTestCase):
+    def test_concurrent_duplicates_check_out_once(self):
+        self.client.post('/api/cart/', {'menuitem': self.pasta.id, 'quantity': 1})
+        barrier = threading.Barrier(5)
+        statuses = []
+
+        def checkout():
+            client = APIClient()
+            client.force_authenticate(self.customer)
+            barrier.wait()
+            statuses.append(client.post('/api/orders/', HTTP_IDEMPOTENCY_KEY='double-tap').status_code)
+            connection.close()
+
+        threads = [threading.Thread(target=checkout) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(statuses, [201] * 5)
+        self.assertEqual(Order.objects.count(), 1)
+
+
+class MenuImportTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(User.objects.create_user('admin', is_staff=True))
+
+    def test_non_finite_price_is_rejected(self):
+        for price in ('NaN', 'Infinity', '-1', '10000'):
+            body = f'title,price,category\nSoup,{price},starters\n'
+            response = self.client.generic('POST', '/api/menu-items/bulk/', body, content_type='text/csv')
+            self.assertEqual(response.status_code, 400, price)
+        self.assertFalse(MenuItem.objects.filter(title='Soup').exists())
+
+    def test_menu_item_titles_are_unique(self):
+        response = self.client.post('/api/menu-items/', {'title': 'Pasta', 'price': '6.00', 'category': self.category.id})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('title', response.json())
+
+    def test_command_reports_malformed_input(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False) as file:
+            file.write('{"title": "Soup", "price": "4.00", "category": "starters"}\n{"title": \n')
+        self.addCleanup(os.remove, file.name)
+        with self.assertRaises(CommandError):
+            call_command('import_menu', file.name, stdout=StringIO())
+        self.assertFalse(MenuItem.objects.filter(title='Soup').exists())
+
+
+class OrderAdminTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        self.crew = User.objects.create_user('rider')
+        self.crew.groups.add(Group.objects.get(name='Delivery Crew'))
+        self.orders = [Order.objects.create(user=self.customer, total='5.00') for _ in range(3)]
+        admin_user = User.objects.create_superuser('admin', password='secret')
+        self.client = Client()
+        self.client.force_login(admin_user)
+        self.url = reverse('admin:LittleLemonAPI_order_changelist')
+
+    def test_assign_crew_asks_for_the_crew_member_first(self):
+        selected = {'action': 'assign_crew', ACTION_CHECKBOX_NAME: [self.orders[0].pk, self.orders[1].pk], 'index': 0}
+        response = self.client.post(self.url, selected)
+        self.assertContains(response, 'Assign the 2 selected orders to')
+        self.assertFalse(Order.objects.filter(delivery_crew=self.crew).exists())
+
+        response = self.client.post(self.url, {**selected, 'apply': 'Assign', 'delivery_crew': self.crew.pk})
+        self.assertRedirects(response, self.url)
+        self.assertEqual(Order.objects.filter(delivery_crew=self.crew).count(), 2)
+        self.assertEqual(self.crew.order_summary.open_deliveries, 2)
+
+    def test_assign_crew_to_all_filtered_orders(self):
+        # "Select all" also ticks the rows of the current page.
+        select_all = {'action': 'assign_crew', 'select_across': '1', 'index': 0, ACTION_CHECKBOX_NAME: [self.orders[0].pk]}
+        response = self.client.post(f'{self.url}?status__exact=0', select_all)
+        self.assertContains(response, 'Assign the 3 selected orders to')
+        self.client.post(f'{self.url}?status__exact=0', {**select_all, 'apply': 'Assign', 'delivery_crew': self.crew.pk})
+        self.assertEqual(Order.objects.filter(delivery_crew=self.crew).count(), 3)
+
+    def test_mark_delivered_counts_open_orders_once(self):
+        Order.objects.filter(pk=self.orders[0].pk).update(status=True)
+        call_command('reconcile_order_summaries', rebuild=True, stdout=StringIO())
+        for _ in range(2):
+            self.client.post(self.url, {
+                'action': 'mark_delivered', ACTION_CHECKBOX_NAME: [order.pk for order in self.orders], 'index': 0,
+            })
+        self.assertFalse(Order.objects.filter(status=False).exists())
+        self.assertEqual(OrderSummary.objects.get(user=self.customer).open_orders, 0)
+
+    def test_edit_compares_with_the_committed_order(self):
+        other = User.objects.create_user('other')
+        order = self.orders[0]
+        # Assigned by another writer after the admin loaded the order.
+        Order.objects.filter(pk=order.pk).update(delivery_crew=self.crew)
+        call_command('reconcile_order_summaries', rebuild=True, stdout=StringIO())
+        with mock.patch.object(OrderAdmin, 'get_object', return_value=order):
+            response = self.client.post(reverse('admin:LittleLemonAPI_order_change', args=[order.pk]), {
+                'user': other.pk, 'delivery_crew': '', 'status': 'on', 'total': '5.00', 'date': timezone.localdate(),
+                'order_items-TOTAL_FORMS': 0, 'order_items-INITIAL_FORMS': 0,
+            })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            set(OrderTombstone.objects.values_list('user', 'delivery_crew')), {(self.customer.pk, None), (None, self.crew.pk)},
+        )
+        self.assertEqual(call_command('reconcile_order_summaries', stdout=StringIO()), None)
+
+    def test_reassigned_crew_gets_a_tombstone(self):
+        other = User.objects.create_user('other rider')
+        other.groups.add(Group.objects.get(name='Delivery Crew'))
+        Order.objects.filter(pk=self.orders[0].pk).update(delivery_crew=other)
+        api = APIClient()
+        api.force_authenticate(other)
+        cursor = api.get('/api/orders/')['X-Sync-Cursor']
+        self.client.post(self.url, {
+            'action': 'assign_crew', ACTION_CHECKBOX_NAME: [self.orders[0].pk], 'index': 0,
+            'apply': 'Assign', 'delivery_crew': self.crew.pk,
+        })
+        response = api.get(f'/api/orders/?since={cursor}').json()
+        self.assertEqual((response['orders'], response['deleted']), ([], [self.orders[0].pk]))
+
+
+class OrderSyncTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        self.crew = User.objects.create_user('rider')
+        self.crew.groups.add(Group.objects.get(name='Delivery Crew'))
+        self.manager = User.objects.create_user('manager')
+        self.manager.groups.add(Group.objects.get(name='Manager'))
+        self.orders = [
+            Order.objects.create(user=self.customer, delivery_crew=self.crew, total='5.00') for _ in range(3)
+        ]
+        # Written before the sync below, beyond the cursor overlap.
+        Order.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        self.cursor = self.client.get('/api/orders/')['X-Sync-Cursor']
+
+    def sync(self, user):
+        self.client.force_authenticate(user)
+        response = self.client.get(f'/api/orders/?since={self.cursor}')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        return [order['id'] for order in data['orders']], data['deleted']
+
+    def test_only_changed_orders_are_returned(self):
+        changed = self.orders[1]
+        self.client.force_authenticate(self.manager)
+        self.client.patch(f'/api/orders/{changed.pk}/', {'status': True})
+        self.assertEqual(self.sync(self.customer), ([changed.pk], []))
+        self.assertEqual(self.sync(self.crew), ([changed.pk], []))
+
+    def test_deleted_and_reassigned_orders_are_reported(self):
+        deleted, reassigned = self.orders[0], self.orders[1]
+        other = User.objects.create_user('other')
+        self.client.force_authenticate(self.manager)
+        self.assertEqual(self.client.delete(f'/api/orders/{deleted.pk}/').status_code, 204)
+        self.client.patch(f'/api/orders/{reassigned.pk}/', {'user': other.pk})
+
+        self.assertEqual(self.sync(self.customer), ([], [deleted.pk, reassigned.pk]))
+        self.assertEqual(self.sync(other), ([reassigned.pk], []))
+        self.assertEqual(self.sync(self.crew), ([reassigned.pk], [deleted.pk]))
+        # Managers still see reassigned orders, so only deletions are reported to them.
+        self.assertEqual(self.sync(self.manager), ([reassigned.pk], [deleted.pk]))
+
+    def test_malformed_cursor_is_rejected(self):
+        for cursor in ('abc', '99999999999999999999999'):
+            self.assertEqual(self.client.get(f'/api/orders/?since={cursor}').status_code, 400)
+
+    def test_expired_cursor_needs_a_full_sync(self):
+        cursor = sync.encode_cursor(timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS + 1))
+        self.assertEqual(self.client.get(f'/api/orders/?since={cursor}').status_code, 410)
+
+
+class CheckoutTests(LittleLemonTestCase):
+    def request(self, method, path, data=None):
+        # Run the on-commit callbacks, in order, as a real commit would.
+        with self.captureOnCommitCallbacks(execute=True):
+            return getattr(self.client, method)(path, data)
+
+    def test_checked_out_cart_is_not_billed_again(self):
+        self.request('post', '/api/cart/', {'menuitem': self.pasta.id, 'quantity': 2})
+        self.assertEqual(self.request('post', '/api/orders/').status_code, 201)
+        self.assertEqual(self.request('get', '/api/cart/').json(), [])
+
+        self.request('post', '/api/cart/', {'menuitem': self.salad.id, 'quantity': 1})
+        self.assertEqual(self.request('post', '/api/orders/').status_code, 201)
+        second = Order.objects.latest('id')
+        self.assertEqual(second.total, Decimal('2.50'))
+        self.assertEqual([item.menuitem for item in second.order_items.all()], [self.salad])
+
+    def test_checkout_rolled_back_keeps_the_cart(self):
+        inventory.set_stock(self.pasta, 1)
+        self.request('post', '/api/cart/', {'menuitem': self.pasta.id, 'quantity': 2})
+        self.assertEqual(self.request('post', '/api/orders/').status_code, 409)
+        self.assertEqual(self.request('get', '/api/cart/').json()[0]['quantity'], 2)
+
+
+@requires_redis
+class CachedCheckoutTests(CachedCartMixin, CheckoutTests):
+    def test_checkout_removes_the_cached_cart(self):
+        self.request('post', '/api/cart/', {'menuitem': self.pasta.id, 'quantity': 2})
+        self.request('post', '/api/orders/')
+        self.assertFalse(self.redis.exists(CART_KEY.format(user_id=self.customer.pk)))
+
+
+class OrderSummaryTests(LittleLemonTestCase):
+    def test_user_must_be_an_id(self):
+        manager = User.objects.create_user('manager')
+        manager.groups.add(Group.objects.get(name='Manager'))
+        self.client.force_authenticate(manager)
+        self.assertEqual(self.client.get('/api/orders/summary/?user=abc').status_code, 400)
+        response = self.client.get(f'/api/orders/summary/?user={self.customer.pk}')
+        self.assertEqual(response.json()['order_count'], 0)
+
+    def test_delivering_twice_counts_once(self):
+        self.client.post('/api/cart/', {'menuitem': self.pasta.id, 'quantity': 1})
+        self.client.post('/api/orders/')
+        order = Order.objects.get()
+        crew = User.objects.create_user('rider')
+        crew.groups.add(Group.objects.get(name='Delivery Crew'))
+        self.client.force_authenticate(crew)
+        for _ in range(2):
+            self.assertEqual(self.client.patch(f'/api/orders/{order.pk}/update/', {'status': True}).status_code, 200)
+        self.assertEqual(self.customer.order_summary.open_orders, 0)
+        self.assertEqual(call_command('reconcile_order_summaries', stdout=StringIO()), None)
+
+    def test_crew_cannot_put_an_order(self):
+        self.client.post('/api/cart/', {'menuitem': self.pasta.id, 'quantity': 1})
+        self.client.post('/api/orders/')
+        order = Order.objects.get()
+        other = User.objects.create_user('other')
+        crew = User.objects.create_user('rider')
+        crew.groups.add(Group.objects.get(name='Delivery Crew'))
+        self.client.force_authenticate(crew)
+        response = self.client.put(f'/api/orders/{order.pk}/update/', {'user': other.pk, 'status': True, 'total': '0.00'})
+        self.assertEqual(response.status_code, 405)
+        order.refresh_from_db()
+        self.assertEqual((order.user, order.status, order.total), (self.customer, False, Decimal('5.00')))
+
+    def test_order_detail_writes_keep_counters(self):
+        self.client.post('/api/cart/', {'menuitem': self.pasta.id, 'quantity': 1})
+        self.client.post('/api/orders/')
+        order = Order.objects.get()
+        manager = User.objects.create_user('manager')
+        manager.groups.add(Group.objects.get(name='Manager'))
+        self.client.force_authenticate(manager)
+        self.assertEqual(self.client.patch(f'/api/orders/{order.pk}/', {'status': True}).status_code, 200)
+        self.assertEqual(self.client.delete(f'/api/orders/{order.pk}/').status_code, 204)
+        summary = OrderSummary.objects.get(user=self.customer)
+        self.assertEqual((summary.order_count, summary.open_orders), (0, 0))
+
+
+class InventoryTests(LittleLemonTestCase):
+    def test_untracked_items_are_not_written(self):
+        with CaptureQueriesContext(connection) as queries:
+            inventory.reserve([(self.pasta.id, 2), (self.salad.id, 1)])
+        self.assertFalse([query for query in queries if query['sql'].startswith('UPDATE')])
+
+    def test_reserve_takes_stock_or_fails_as_a_whole(self):
+        inventory.set_stock(self.pasta, 3)
+        inventory.set_stock(self.salad, 4, shards=2)
+        inventory.reserve([(self.pasta.id, 2), (self.salad.id, 3)])
+        self.pasta.refresh_from_db()
+        self.salad.refresh_from_db()
+        self.assertEqual((inventory.available(self.pasta), inventory.available(self.salad)), (1, 1))
+        with self.assertRaises(inventory.OutOfStock) as raised:
+            inventory.reserve([(self.pasta.id, 2)])
+        self.assertEqual(raised.exception.titles, ['Pasta'])
+
+    def test_saving_a_stale_item_keeps_the_stock(self):
+        inventory.set_stock(self.pasta, 3)
+        stale = MenuItem.objects.get(pk=self.pasta.pk)  # e.g. loaded by a price change before a checkout
+        inventory.reserve([(self.pasta.id, 2)])
+        stale.price = '6.00'
+        stale.save()
+        self.pasta.refresh_from_db()
+        self.assertEqual((self.pasta.price, self.pasta.stock), (Decimal('6.00'), 1))
+
+
+class RepricingTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        other = User.objects.create_user('other')
+        for user in (self.customer, other):
+            for menuitem in (self.pasta, self.salad):
+                Cart.objects.create(
+                    user=user, menuitem=menuitem, quantity=2, unit_price=menuitem.price, price=2 * Decimal(menuitem.price),
+                )
+        self.client.force_authenticate(User.objects.create_user('admin', is_staff=True))
+
+    def test_price_change_reprices_that_item_in_one_update(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(f'/api/menu-items/{self.pasta.id}/', {'price': '6.00'})
+        self.assertEqual(response.status_code, 200)
+        cart_updates = [query for query in queries if query['sql'].startswith('UPDATE "LittleLemonAPI_cart"')]
+        self.assertEqual(len(cart_updates), 1)
+        self.assertEqual(set(Cart.objects.filter(menuitem=self.pasta).values_list('unit_price', 'price')), {(6, 12)})
+        self.assertEqual(set(Cart.objects.filter(menuitem=self.salad).values_list('unit_price', 'price')), {(Decimal('2.50'), 5)})
+
+    def test_save_after_create_reprices(self):
+        soup = MenuItem.objects.create(title='Soup', price='4.00', category=self.category)
+        Cart.objects.create(user=self.customer, menuitem=soup, quantity=2, unit_price='4.00', price='8.00')
+        soup.price = Decimal('7.00')
+        soup.save()
+        self.assertEqual(Cart.objects.get(menuitem=soup).price, 14)
+
+    def test_current_lines_are_left_alone(self):
+        MenuItem.objects.filter(pk=self.pasta.pk).update(price='5.50')
+        self.assertEqual(reprice_carts(), 2)
+        self.assertEqual(reprice_carts(), 0)
+
+
+@requires_redis
+class CachedRepricingTests(CachedCartMixin, LittleLemonTestCase):
+    def test_cached_carts_reprice_on_read(self):
+        store = CachedCartStore()
+        store.add(self.customer, self.pasta, 2)
+        version = store.menu_version()
+        self.pasta.price = Decimal('6.00')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pasta.save()
+        self.assertEqual(store.menu_version(), version + 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.get('/api/cart/')
+        self.assertEqual(response.json()[0]['price'], '12.00')
+
+
+class ProfilingTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        settings_override = override_settings(PROFILING_DIR=self.directory, PROFILING_MAX_FILES=2)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        staff = User.objects.create_user('staff', is_staff=True)
+        self.token = Token.objects.create(user=staff)
+        self.staff_client = APIClient()
+        self.staff_client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_non_staff_requests_are_not_profiled(self):
+        token = Token.objects.create(user=self.customer)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        response = client.get('/api/menu-items/', HTTP_X_PROFILE='1')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(list(self.directory.iterdir()), [])
+
+    def test_staff_request_writes_a_profile_without_secrets(self):
+        response = self.staff_client.get('/api/menu-items/', HTTP_X_PROFILE='1')
+        profile_id = response['X-Profile-Id']
+        self.assertTrue((self.directory / f'{profile_id}.pstats').exists())
+        metadata = (self.directory / f'{profile_id}.json').read_text()
+        self.assertIn('LittleLemonAPI_menuitem', metadata)
+        self.assertNotIn(self.token.key, metadata)
+
+    def test_only_the_latest_profiles_are_kept(self):
+        ids = [self.staff_client.get('/api/menu-items/?profile=1')['X-Profile-Id'] for _ in range(3)]
+        self.assertEqual(list_profiles(), ids[1:])
+        self.assertEqual(len(list(self.directory.iterdir())), 4)
+
+    def test_request_profiled_meanwhile_is_served_unprofiled(self):
+        with profiling._profiling:
+            response = self.staff_client.get('/api/menu-items/', HTTP_X_PROFILE='1')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Profile-Id', response)
+
+    def test_profiles_command_summarizes_a_profile(self):
+        profile_id = self.staff_client.get('/api/menu-items/?profile=1')['X-Profile-Id']
+        out = StringIO()
+        call_command('profiles', profile_id, stdout=out)
+        self.assertIn('/api/menu-items/', out.getvalue())
+        self.assertIn('LittleLemonAPI_menuitem', out.getvalue())
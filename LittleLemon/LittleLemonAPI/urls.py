@@ -8,11 +8,13 @@ Routes:
 - categories/                   -> List or create menu categories
 - menu-items/                  -> List or create menu items
 - menu-items/create/           -> Admin-only endpoint to add new menu items
+- menu-items/bulk/             -> Manager/admin bulk catalog export (GET) and import (POST)
 - menu-items/<int:pk>/         -> Retrieve, update, or delete a specific menu item
 
 - cart/                        -> Customer cart operations (view, add, remove)
 
 - orders/                      -> Place an order or list orders (role-based visibility)
+- orders/summary/              -> Order count, lifetime spend and open orders/deliveries of a user
 - orders/<int:pk>/             -> Retrieve, update, or delete a specific order
 - orders/<int:pk>/update/      -> Delivery crew updates order status
 
@@ -32,9 +34,11 @@ urlpatterns = [
     path('categories/', CategoryListCreateView.as_view(), name='categories'),
     path('menu-items/', MenuItemListCreateView.as_view(), name='menu-items'),
     path('menu-items/create/', views.MenuItemCreateView.as_view()),
+    path('menu-items/bulk/', views.MenuItemBulkView.as_view()),
 
     path('cart/', views.CartView.as_view()),
     path('orders/', views.OrderView.as_view()),
+    path('orders/summary/', views.OrderSummaryView.as_view()),
     path('orders/<int:pk>/update/', views.OrderUpdateView.as_view()),
 
     path('users/manager/', views.ManagerUserView.as_view()),
@@ -23,22 +23,41 @@ View Overview:
 - MenuItemCreateView:
     Admin-only view for adding menu items.
 
+- MenuItemBulkView:
+    Stream the whole catalog out (GET) or upsert it in bulk (POST) as CSV or
+    JSON Lines (see catalog.py).
+    Permissions: Admins and managers.
+
 - CartView:
     Authenticated users can add/remove items to their cart or view cart items.
+    Carts are kept by the store selected with the CART_STORAGE setting
+    (see carts.py).
+    POST accepts an Idempotency-Key header so that retries are executed
+    only once (see idempotency.py).
 
 - OrderView:
     Authenticated users can place orders based on their cart.
+    POST accepts an Idempotency-Key header like CartView.
+    Checkout reserves the stock of every cart line or fails as a whole (see inventory.py).
     Queryset is filtered by role:
         - Managers see all orders
         - Delivery Crew sees their assigned orders
         - Customers see only their own orders
+    GET ?since=<cursor> returns only the orders changed since a previous sync,
+    plus the ids of orders removed from the list (see sync.py).
 
 - OrderUpdateView:
     Delivery Crew can update the status of assigned orders.
 
+- OrderSummaryView:
+    Order count, lifetime spend and open orders/deliveries of the current user
+    (managers can pass ?user=<id>), read from counters kept up to date on
+    every order write (see summaries.py).
+
 - OrderDetailView:
     Retrieve, update, or delete a specific order.
     Role-based access similar to OrderView.
+    Deletions and changes of customer are recorded as tombstones for syncing clients.
 
 - ManagerUserView:
     Admin assigns a user to the "Manager" group.
@@ -53,18 +72,26 @@ Permissions: Role-based via custom and DRF permission classes
 
 
 # Create your views here.
-from rest_framework import generics, viewsets, status
+import csv
+
+from rest_framework import generics, viewsets, status, serializers
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from django.contrib.auth.models import User, Group
 from django.shortcuts import get_object_or_404
+from django.http import StreamingHttpResponse
+from django.db import transaction
 
-from .models import Category, MenuItem, Cart, Order, OrderItem
+from .models import Category, MenuItem, Cart, Order, OrderItem, OrderTombstone, OrderSummary
 from .serializers import (
     CategorySerializer, MenuItemSerializer, CartSerializer, 
-    AddToCartSerializer, OrderSerializer, UserSerializer
+    AddToCartSerializer, OrderSerializer, UserSerializer, OrderSummarySerializer
 )
 from .permissions import IsManager, IsDeliveryCrew
+from .carts import get_cart_store
+from .idempotency import idempotent
+from .catalog import FORMATS, read_rows, import_menu, export_menu
+from . import sync, summaries, inventory
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAdminUser, IsAuthenticatedOrReadOnly
 from rest_framework.authentication import TokenAuthentication
@@ -105,6 +132,39 @@ class MenuItemCreateView(generics.CreateAPIView):
     serializer_class = MenuItemSerializer
     permission_classes = [IsAdminUser]
 
+# MenuItemBulkView:
+# Bulk catalog import/export
+# Permissions: Admins and managers.
+# GET streams the catalog (?type=csv or ?type=jsonl, csv by default).
+# POST reads the request body as a stream; its Content-Type picks the format
+# (text/csv or application/jsonl).
+class MenuItemBulkView(APIView):
+    permission_classes = [IsAuthenticated, IsAdminUser | IsManager]
+
+    def get(self, request):
+        fmt = request.query_params.get('type', 'csv')
+        if fmt not in FORMATS:
+            return Response({'message': f'Unknown type, expected one of: {", ".join(FORMATS)}'}, status=400)
+        response = StreamingHttpResponse(export_menu(fmt), content_type=FORMATS[fmt])
+        response['Content-Disposition'] = f'attachment; filename="menu.{fmt}"'
+        return response
+
+    def post(self, request):
+        content_type = request.content_type.split(';')[0].strip()
+        formats = {mime: fmt for fmt, mime in FORMATS.items()}
+        formats['application/x-ndjson'] = 'jsonl'
+        if content_type not in formats:
+            return Response({'message': f'Unsupported Content-Type, expected one of: {", ".join(formats)}'}, status=415)
+        if request.stream is None:
+            return Response({'message': 'Empty body'}, status=400)
+
+        lines = (line.decode('utf-8') for line in request.stream)
+        try:
+            result = import_menu(read_rows(lines, formats[content_type]))
+        except (ValueError, csv.Error) as exc:
+            return Response({'message': str(exc)}, status=400)
+        return Response({'message': 'Menu imported', **result}, status=201)
+
 # CartView:
 # Add/Remove from Cart (customer)
 # Permissions: Authenticated users can add/remove items to their cart or view cart items.
@@ -113,19 +173,16 @@ class CartView(generics.ListCreateAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return Cart.objects.filter(user=self.request.user)
+        return get_cart_store().lines(self.request.user)
 
+    @idempotent
     def post(self, request, *args, **kwargs):
-        menuitem_id = request.data['menuitem']
-        quantity = int(request.data['quantity'])
+        menuitem_id = request.data.get('menuitem')
+        # Rejected before storing: cached carts are only checked by the database when written behind.
+        quantity = serializers.IntegerField(min_value=1).run_validation(request.data.get('quantity'))
         menuitem = get_object_or_404(MenuItem, id=menuitem_id)
-        price = quantity * menuitem.price
 
-        cart_item, created = Cart.objects.update_or_create(
-            user=request.user,
-            menuitem=menuitem,
-            defaults={'quantity': quantity, 'unit_price': menuitem.price, 'price': price}
-        )
+        get_cart_store().add(request.user, menuitem, quantity)
         return Response({'message': 'Added to cart'}, status=201)
 
 
@@ -135,6 +192,7 @@ class CartView(generics.ListCreateAPIView):
 # - Managers see all orders
 # - Delivery Crew sees their assigned orders
 # - Customers see only their own orders
+# ?since=<cursor> returns only what changed since the sync that returned the cursor.
 class OrderView(generics.ListCreateAPIView):
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]
@@ -147,23 +205,75 @@ class OrderView(generics.ListCreateAPIView):
             return Order.objects.filter(delivery_crew=user)
         return Order.objects.filter(user=user)
 
+    def get_tombstones(self):
+        user = self.request.user
+        if user.groups.filter(name="Manager").exists():
+            return OrderTombstone.objects.filter(order_deleted=True)
+        if user.groups.filter(name="Delivery Crew").exists():
+            return OrderTombstone.objects.filter(delivery_crew=user)
+        return OrderTombstone.objects.filter(user=user)
+
+    def list(self, request, *args, **kwargs):
+        # Taken before reading so that nothing written meanwhile is skipped next time.
+        cursor = sync.current_cursor()
+        since = request.query_params.get('since')
+        if since is None:
+            response = super().list(request, *args, **kwargs)
+            response['X-Sync-Cursor'] = cursor
+            return response
+
+        try:
+            since = sync.decode_cursor(since)
+        except sync.CursorExpired as exc:
+            return Response({"message": str(exc)}, status=410)
+        except (ValueError, OverflowError, OSError):
+            return Response({"message": "Invalid cursor"}, status=400)
+
+        orders = (
+            self.get_queryset().filter(updated_at__gte=since)
+            .select_related('delivery_crew')
+            .prefetch_related('order_items__menuitem')
+        )
+        deleted = self.get_tombstones().filter(deleted_at__gte=since).values_list('order_id', flat=True)
+        return Response({
+            "cursor": cursor,
+            "orders": self.get_serializer(orders, many=True).data,
+            "deleted": sorted(set(deleted)),
+        })
+
+    @idempotent
+    @transaction.atomic
     def create(self, request, *args, **kwargs):
+        # Cached carts are written behind to Cart rows before checking out.
+        cart_store = get_cart_store()
+        cart_store.materialize(request.user)
         items = Cart.objects.filter(user=request.user)
         if not items:
             return Response({"message": "Cart is empty"}, status=400)
 
+        try:
+            inventory.reserve((item.menuitem_id, item.quantity) for item in items)
+        except inventory.OutOfStock as exc:
+            transaction.set_rollback(True)
+            return Response({"message": str(exc), "menuitems": exc.titles}, status=409)
+
         total = sum([item.price for item in items])
         order = Order.objects.create(user=request.user, total=total)
 
-        for item in items:
-            OrderItem.objects.create(
+        # Created in bulk with the order, so they don't need to touch it.
+        OrderItem.objects.bulk_create(
+            OrderItem(
                 order=order,
-                menuitem=item.menuitem,
+                menuitem_id=item.menuitem_id,
                 quantity=item.quantity,
                 unit_price=item.unit_price,
                 price=item.price
             )
+            for item in items
+        )
         items.delete()
+        cart_store.clear(request.user)
+        summaries.record_change(None, summaries.snapshot(order))
         return Response({"message": "Order placed"}, status=201)
 
 # OrderUpdateView:
@@ -174,14 +284,44 @@ class OrderUpdateView(generics.UpdateAPIView):
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated, IsDeliveryCrew]
+    # Only the status can be changed here; a full PUT would skip the summary counters and tombstones.
+    http_method_names = ['patch', 'options']
+
+    def get_queryset(self):
+        if self.request.method == 'PATCH':
+            # Locked so that concurrent updates take their summary deltas from the committed row.
+            return Order.objects.select_for_update()
+        return super().get_queryset()
 
+    @transaction.atomic
     def patch(self, request, *args, **kwargs):
         order = self.get_object()
-        order.status = request.data.get('status', order.status)
+        before = summaries.snapshot(order)
+        order.status = serializers.BooleanField().to_internal_value(request.data.get('status', order.status))
         order.save()
+        summaries.record_change(before, summaries.snapshot(order))
         return Response({'message': 'Order updated'})
 
 
+# OrderSummaryView:
+# Order counters of the current user (managers can ask for any user with ?user=<id>)
+# Permissions: Authenticated users.
+class OrderSummaryView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        user_id = request.user.pk
+        if 'user' in request.query_params:
+            if not IsManager().has_permission(request, self):
+                return Response({'message': 'Only managers can view other users'}, status=403)
+            try:
+                user_id = int(request.query_params['user'])
+            except ValueError:
+                return Response({'message': 'Invalid user'}, status=400)
+        summary = OrderSummary.objects.filter(user_id=user_id).first() or OrderSummary(user_id=user_id)
+        return Response(OrderSummarySerializer(summary).data)
+
+
 # User assignment to groups
 # ManagerUserView:
 # Admin assigns users to manager group
@@ -221,7 +361,34 @@ class OrderDetailView(RetrieveUpdateDestroyAPIView):
     def get_queryset(self):
         user = self.request.user
         if user.groups.filter(name="Manager").exists():
-            return Order.objects.all()
-        if user.groups.filter(name="Delivery Crew").exists():
-            return Order.objects.filter(delivery_crew=user)
-        return Order.objects.filter(user=user)
\ No newline at end of file
+            queryset = Order.objects.all()
+        elif user.groups.filter(name="Delivery Crew").exists():
+            queryset = Order.objects.filter(delivery_crew=user)
+        else:
+            queryset = Order.objects.filter(user=user)
+        if self.request.method in ('PUT', 'PATCH', 'DELETE'):
+            # Locked so that concurrent writes take their summary deltas from the committed row.
+            queryset = queryset.select_for_update()
+        return queryset
+
+    @transaction.atomic
+    def update(self, request, *args, **kwargs):
+        return super().update(request, *args, **kwargs)
+
+    @transaction.atomic
+    def destroy(self, request, *args, **kwargs):
+        return super().destroy(request, *args, **kwargs)
+
+    def perform_update(self, serializer):
+        previous_user_id = serializer.instance.user_id
+        before = summaries.snapshot(serializer.instance)
+        order = serializer.save()
+        if order.user_id != previous_user_id:
+            sync.record_lost_access(order.id, user_id=previous_user_id)
+        summaries.record_change(before, summaries.snapshot(order))
+
+    def perform_destroy(self, instance):
+        sync.record_deletions([instance])
+        summaries.record_change(summaries.snapshot(instance), None)
+        inventory.release_orders(Order.objects.filter(pk=instance.pk))
+        instance.delete()
\ No newline at end of file